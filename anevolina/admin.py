@@ -1,7 +1,23 @@
+from django import forms
 from django.contrib import admin
 
 # Register your models here.
 
+from anevolina.images import image_choices
 from anevolina.models import Project
 
-admin.site.register(Project)
+
+class ProjectAdmin(admin.ModelAdmin):
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        """Image choices come from a cached listing of the directory instead of scanning it for every form"""
+
+        if db_field.name == 'image':
+            return forms.ChoiceField(choices=image_choices(db_field.path, not db_field.blank),
+                                     required=not db_field.blank, label=db_field.verbose_name.capitalize(),
+                                     help_text=db_field.help_text)
+
+        return super().formfield_for_dbfield(db_field, request, **kwargs)
+
+
+admin.site.register(Project, ProjectAdmin)
@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AnevolinaConfig(AppConfig):
     name = 'anevolina'
+
+    def ready(self):
+        # Management commands and tests skip warm-up to stay fast, workers run it in portfolio/wsgi.py
+        if getattr(settings, 'WARM_UP_ON_READY', False):
+            from anevolina.warmup import warm_up
+            warm_up()
@@ -0,0 +1,43 @@
+'''
+This module keeps rendered project cards for the index page.
+A card is rendered when the project is saved and stored in the cache under a key
+with a fingerprint of the project fields and of the static files its image urls come from,
+so a worker never shows an outdated card - it just renders the new one once
+'''
+
+import hashlib
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from anevolina.images import responsive_image, static_version
+
+CARD_TEMPLATE = 'anevolina/project_card.html'
+
+
+def card_key(project):
+    fields = '\n'.join(str(value) for value in [project.pk, project.title, project.description, project.image,
+                                                 project.source_url, static_version(project.image)])
+    fingerprint = hashlib.md5(fields.encode('utf-8')).hexdigest()
+
+    return 'project-card:{}:{}'.format(project.pk, fingerprint)
+
+
+def render_card(project):
+    """Render the card and store it until the project changes"""
+
+    card = render_to_string(CARD_TEMPLATE, {'project': project, 'image': responsive_image(project.image)})
+    cache.set(card_key(project), card, timeout=None)
+
+    return mark_safe(card)
+
+
+def get_cards(projects):
+    """Stored cards for projects, missing ones are rendered"""
+
+    projects = list(projects)
+    keys = [card_key(project) for project in projects]
+    stored = cache.get_many(keys)
+
+    return [mark_safe(stored[key]) if key in stored else render_card(project) for key, project in zip(keys, projects)]
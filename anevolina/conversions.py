@@ -0,0 +1,66 @@
+'''
+This module keeps conversion results in the cache.
+A result depends only on the line and the target profile, so the converter page,
+live editing and the translation path share results instead of converting
+the same lines again. Lines which ran out of the budget aren't stored.
+Lines converted by the page with exported tables are checked against the same results
+'''
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from anevolina.modules.converter import clock, get_converter
+
+# Change it when the converter or coefficients change, so old results are not used
+RESULT_VERSION = 1
+
+
+def result_key(profile_name, line):
+    fingerprint = hashlib.md5(line.encode('utf-8')).hexdigest()
+
+    return 'conversion:{}:{}:{}'.format(RESULT_VERSION, profile_name, fingerprint)
+
+
+def convert_lines(profile_name, lines, budget=None, line_budget=None):
+    """Results for lines, stored ones are taken from the cache and the rest is converted within the budget"""
+
+    keys = [result_key(profile_name, line) for line in lines]
+    stored = cache.get_many(keys)
+
+    missing = list(dict.fromkeys(line for line, key in zip(lines, keys) if key not in stored))
+    converted = get_converter(profile_name).convert_many(missing, budget, line_budget)
+
+    new = {result_key(profile_name, result.source): result for result in converted if result.complete}
+    cache.set_many(new, timeout=settings.CONVERTER_RESULT_TIMEOUT)
+
+    results = dict(zip(missing, converted))
+
+    return [stored[key] if key in stored else results[line] for line, key in zip(lines, keys)]
+
+
+def check_client_results(results, budget=None, line_budget=None):
+    """Compare lines converted by the page {profile: [[line, converted line or None]]} with the server.
+    None means the page left the line to the server. The budget is for all profiles, lines which
+    weren't converted within it stay unchecked. Returns mismatches and the number of checked lines"""
+
+    mismatches = []
+    checked = 0
+    deadline = clock() + budget if budget else None
+
+    for profile_name, pairs in results.items():
+        pairs = [(line, text) for line, text in pairs if text is not None]
+        # A tiny positive budget instead of 0 which means no limit
+        left = max(deadline - clock(), 1e-9) if deadline is not None else None
+        expected = convert_lines(profile_name, [line for line, text in pairs], left, line_budget)
+
+        for (line, text), result in zip(pairs, expected):
+            if not result.complete:
+                continue
+
+            checked += 1
+            if text != result.text:
+                mismatches.append({'profile': profile_name, 'line': line, 'client': text, 'server': result.text})
+
+    return mismatches, checked
@@ -1,7 +1,19 @@
 from django import forms
+from django.conf import settings
 
 class ConverterForm(forms.Form):
     class Meta:
         fields = ['recipe']
 
-    recipe = forms.CharField(label='', widget=forms.Textarea(), required=False)
\ No newline at end of file
+    recipe = forms.CharField(label='', widget=forms.Textarea(), required=False,
+                             max_length=settings.CONVERTER_MAX_CHARS)
+
+    def clean_recipe(self):
+        recipe = self.cleaned_data['recipe']
+        lines = recipe.count('\n') + 1
+
+        if lines > settings.CONVERTER_MAX_LINES:
+            raise forms.ValidationError('The recipe is too long: {} lines, maximum is {}'.format(
+                lines, settings.CONVERTER_MAX_LINES))
+
+        return recipe
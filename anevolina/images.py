@@ -0,0 +1,186 @@
+'''
+This module prepares responsive versions of project images.
+When a project is saved its image is resized to several widths as WebP and JPEG.
+Variants go to img/variants/ and their sizes are written to a json file next to them,
+so the card template gets srcset, width and height without opening any image.
+Pillow is optional and imported only when variants are made - without it cards
+show the original image as before. Variants made after collectstatic aren't in
+the staticfiles manifest yet, cards use the original image until the next collectstatic
+'''
+
+import json
+import logging
+import os
+from functools import lru_cache
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'img/variants'
+WEBP = 'image/webp'
+JPEG = 'image/jpeg'
+
+
+@lru_cache(maxsize=None)
+def load_pil():
+    """Import Pillow on the first call. None if it isn't installed - images are used as they are without it"""
+
+    try:
+        return import_module('PIL.Image')
+    except ImportError:
+        return None
+
+
+def static_dir():
+    return settings.STATICFILES_DIRS[0]
+
+
+def sidecar_path(image):
+    """Json file with sizes of the image and its variants. image is a path in static files"""
+
+    name = os.path.splitext(os.path.basename(image))[0]
+
+    return os.path.join(static_dir(), VARIANTS_DIR, name + '.json')
+
+
+def static_version(image):
+    """Changes when urls of the image may change - after collectstatic writes a new manifest
+    or new variants of the image are made"""
+
+    paths = [sidecar_path(image)]
+    manifest_name = getattr(staticfiles_storage, 'manifest_name', None)
+    if manifest_name and settings.STATIC_ROOT:
+        paths.append(os.path.join(settings.STATIC_ROOT, manifest_name))
+
+    return ':'.join(str(modified_time(path)) for path in paths)
+
+
+def modified_time(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def make_variants(image):
+    """Write WebP and JPEG copies of the image for all PROJECT_IMAGE_WIDTHS smaller than the original,
+    a WebP copy of the original size and a json file with their sizes.
+    Returns the description or None if it can't be done"""
+
+    image = image.lstrip('/')
+    source = os.path.join(static_dir(), image)
+    Image = load_pil()
+
+    if Image is None or not os.path.isfile(source):
+        return None
+
+    name = os.path.splitext(os.path.basename(image))[0]
+    os.makedirs(os.path.join(static_dir(), VARIANTS_DIR), exist_ok=True)
+
+    try:
+        with Image.open(source) as original:
+            description = {'image': image, 'width': original.width, 'height': original.height, 'variants': []}
+
+            widths = [width for width in sorted(settings.PROJECT_IMAGE_WIDTHS) if width < original.width]
+
+            for width in widths + [original.width]:
+                height = round(original.height * width / original.width)
+                resized = original.resize((width, height), Image.LANCZOS) if width < original.width else original
+
+                # The original itself is the largest JPEG candidate
+                for mime in [WEBP, JPEG] if width < original.width else [WEBP]:
+                    path = '{}/{}-{}w.{}'.format(VARIANTS_DIR, name, width, 'webp' if mime == WEBP else 'jpg')
+                    save_variant(resized, os.path.join(static_dir(), path), mime)
+                    description['variants'].append({'path': path, 'width': width, 'height': height, 'type': mime})
+
+    except OSError as error:
+        logger.warning('Image variants for %s were not made: %r', image, error)
+        return None
+
+    with open(sidecar_path(image), 'w') as sidecar:
+        json.dump(description, sidecar, indent=2)
+
+    return description
+
+
+def save_variant(image, path, mime):
+    Image = load_pil()
+
+    if mime == JPEG:
+        if image.mode in ('RGBA', 'LA', 'P'):     # JPEG has no transparency - put the image on white
+            transparent = image.convert('RGBA')
+            image = Image.new('RGB', image.size, 'white')
+            image.paste(transparent, mask=transparent.split()[-1])
+        image.convert('RGB').save(path, 'JPEG', quality=82, optimize=True, progressive=True)
+    else:
+        image.save(path, 'WEBP', quality=80, method=6)
+
+
+def load_variants(image):
+    """Description written by make_variants, None if there isn't one"""
+
+    try:
+        with open(sidecar_path(image)) as sidecar:
+            return json.load(sidecar)
+    except (OSError, ValueError):
+        return None
+
+
+def responsive_image(image):
+    """Attributes of the image for the card template: src, srcset, width, height, sizes,
+    and sources - srcset for WebP"""
+
+    image = image.lstrip('/')
+    # An image added after collectstatic isn't in the manifest either - its url isn't hashed until then
+    result = {'src': static_url(image) or settings.STATIC_URL + image, 'srcset': '', 'width': None, 'height': None,
+              'sizes': settings.PROJECT_IMAGE_SIZES, 'sources': []}
+
+    description = load_variants(image)
+    if not description or description.get('image') != image:
+        return result
+
+    result.update(width=description['width'], height=description['height'])
+    urls = {variant['path']: static_url(variant['path']) for variant in description['variants']}
+
+    def srcset(mime):
+        return ', '.join('{} {}w'.format(urls[variant['path']], variant['width'])
+                         for variant in description['variants'] if variant['type'] == mime and urls[variant['path']])
+
+    if srcset(JPEG):
+        result['srcset'] = '{}, {} {}w'.format(srcset(JPEG), result['src'], description['width'])
+    if srcset(WEBP):
+        result['sources'].append({'type': WEBP, 'srcset': srcset(WEBP)})
+
+    return result
+
+
+def static_url(path):
+    """Url of a static file, None if the staticfiles manifest doesn't have it"""
+
+    try:
+        return static(path)
+    except ValueError:
+        return None
+
+
+def image_choices(path, required=True):
+    """Choices of the Project.image form field. The directory is listed again only when it changes"""
+
+    return list_images(path, os.stat(path).st_mtime_ns, required)
+
+
+@lru_cache(maxsize=8)
+def list_images(path, modified, required):
+    """The same choices as forms.FilePathField makes - files directly in the directory"""
+
+    choices = [] if required else [('', '---------')]
+
+    for entry in sorted(os.scandir(path), key=lambda entry: entry.name):
+        if entry.is_file() and entry.name != '__init__.py':
+            choices.append((os.path.join(path, entry.name), entry.name))
+
+    return choices
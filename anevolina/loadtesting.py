@@ -0,0 +1,263 @@
+'''
+This module simulates traffic on the site.
+A stub replaces the translation service with configurable latency and errors,
+workers request the index, project pages and the converter in a given mix,
+and latencies are collected per endpoint. Translations the site skipped because
+all slots were busy or the stub failed are counted apart as shed
+'''
+
+import math
+import random
+import re
+import threading
+import time
+from collections import defaultdict, namedtuple
+from http.cookiejar import CookieJar
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, urlencode
+from urllib.request import HTTPCookieProcessor, build_opener
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+Endpoint = namedtuple('Endpoint', ['name', 'method', 'path', 'data'])
+
+SAMPLE_RECIPE = '\n'.join([
+    'Chocolate chip cookies',
+    '2 1/4 cups all-purpose flour',
+    '1 tsp baking soda',
+    '1 cup butter, softened',
+    '3/4 cup granulated sugar',
+    '3/4 cup packed brown sugar',
+    '2 large eggs',
+    '2 cups chocolate chips',
+    '1 cup chopped walnuts',
+    'Preheat oven to 375 F.',
+    'Bake in a 9x13 inch pan for 9 to 11 minutes.',
+])
+
+CSRF_TEMPLATE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+# The page keeps 'translate to Russian' checked only if the recipe was translated
+TRANSLATED_TEMPLATE = re.compile(r'name="to_translate"[^>]*value="RU"[^>]*checked')
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubTranslationHandler(BaseHTTPRequestHandler):
+    """Speaks the protocol of translate_with_service - form fields text and dest, plain text answer.
+    Every line is prefixed with the language, so the number of lines doesn't change"""
+
+    latency = 0
+    error_rate = 0
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        fields = parse_qs(self.rfile.read(length).decode('utf-8'))
+
+        time.sleep(self.latency)
+
+        if random.random() < self.error_rate:
+            self.send_error(503, 'Injected error')
+            return
+
+        dest = fields.get('dest', ['ru'])[0]
+        text = fields.get('text', [''])[0]
+        answer = '\n'.join('[{}] {}'.format(dest, line) for line in text.split('\n')).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(answer)))
+        self.end_headers()
+        self.wfile.write(answer)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_in_thread(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server
+
+
+def start_stub(port=0, latency=0, error_rate=0):
+    """Start the translation stub in a background thread and return the server"""
+
+    handler = type('StubHandler', (StubTranslationHandler,), {'latency': latency, 'error_rate': error_rate})
+
+    return start_in_thread(ThreadingHTTPServer(('127.0.0.1', port), handler))
+
+
+def start_site(application, port=0):
+    """Serve the wsgi application in a background thread and return the server"""
+
+    server = make_server('127.0.0.1', port, application, server_class=ThreadingWSGIServer,
+                         handler_class=QuietWSGIRequestHandler)
+
+    return start_in_thread(server)
+
+
+def endpoints(project_pks, converter_pk):
+    """All endpoints of the site the load generator knows about"""
+
+    result = {
+        'index': [Endpoint('index', 'GET', '/', None)],
+        'project': [Endpoint('project', 'GET', '/{}/'.format(pk), None) for pk in project_pks],
+    }
+
+    for language in ['EN', 'RU']:
+        data = {'recipe': SAMPLE_RECIPE, 'to_translate': language}
+        result['convert_' + language.lower()] = [Endpoint('convert_' + language.lower(), 'POST',
+                                                          '/{}/'.format(converter_pk), data)]
+
+    return result
+
+
+def parse_mix(mix):
+    """'index=4,project=3' -> {'index': 4, 'project': 3}"""
+
+    result = {}
+
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        result[name.strip()] = float(weight or 1)
+
+    return result
+
+
+class LoadGenerator:
+
+    def __init__(self, base_url, endpoints, mix, concurrency=8, requests=500, duration=None, seed=0):
+        self.base_url = base_url.rstrip('/')
+        self.endpoints = endpoints
+        self.names = [name for name in mix if mix[name] > 0]
+        self.weights = [mix[name] for name in self.names]
+        self.concurrency = concurrency
+        self.requests = requests
+        self.duration = duration
+        self.seed = seed
+
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.lock = threading.Lock()
+        self.sent = 0
+
+    def run(self):
+        """Run all workers, return elapsed time in seconds"""
+
+        started = time.perf_counter()
+        self.deadline = started + self.duration if self.duration else None
+
+        workers = [threading.Thread(target=self.work, args=(self.seed + number,)) for number in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        return time.perf_counter() - started
+
+    def next_request(self):
+        """False when the load generator has to stop"""
+
+        with self.lock:
+            if self.deadline and time.perf_counter() >= self.deadline:
+                return False
+            if not self.deadline and self.sent >= self.requests:
+                return False
+            self.sent += 1
+            return True
+
+    def work(self, seed):
+        generator = random.Random(seed)
+        opener = build_opener(HTTPCookieProcessor(CookieJar()))
+        csrf_token = None
+
+        while self.next_request():
+            name = generator.choices(self.names, self.weights)[0]
+            endpoint = generator.choice(self.endpoints[name])
+
+            if endpoint.method == 'POST' and csrf_token is None:
+                csrf_token = self.fetch_csrf_token(opener, endpoint.path)
+
+            self.send(opener, endpoint, csrf_token)
+
+    def fetch_csrf_token(self, opener, path):
+        """The converter form needs a csrf cookie and token - get them from the form page"""
+
+        with opener.open(self.base_url + path) as response:
+            match = CSRF_TEMPLATE.search(response.read().decode('utf-8'))
+
+        return match.group(1) if match else ''
+
+    def send(self, opener, endpoint, csrf_token):
+        data = None
+        if endpoint.data is not None:
+            data = urlencode(dict(endpoint.data, csrfmiddlewaretoken=csrf_token)).encode('utf-8')
+
+        started = time.perf_counter()
+        body = b''
+
+        try:
+            with opener.open(self.base_url + endpoint.path, data=data) as response:
+                body = response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        except OSError as error:
+            status = type(error).__name__
+
+        latency = time.perf_counter() - started
+        name = endpoint.name
+
+        # A recipe shown in English is fast because the translation was skipped - keep it apart
+        if status == 200 and (endpoint.data or {}).get('to_translate') == 'RU' \
+                and not TRANSLATED_TEMPLATE.search(body.decode('utf-8', 'replace')):
+            name += '_shed'
+
+        with self.lock:
+            self.latencies[name].append(latency)
+            self.statuses[name][status] += 1
+
+    def report(self, elapsed):
+        """Lines of the report - throughput and latency percentiles per endpoint"""
+
+        lines = ['{:<16} {:>8} {:>9} {:>9} {:>9} {:>9}  {}'.format('endpoint', 'requests', 'req/s', 'p50 ms',
+                                                                   'p95 ms', 'p99 ms', 'statuses')]
+        total = 0
+
+        for name in sorted(self.latencies):
+            latencies = sorted(self.latencies[name])
+            total += len(latencies)
+            statuses = ', '.join('{}: {}'.format(status, count)
+                                 for status, count in sorted(self.statuses[name].items(), key=str))
+            lines.append('{:<16} {:>8} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f}  {}'.format(
+                name, len(latencies), len(latencies) / elapsed, percentile(latencies, 50)*1000,
+                percentile(latencies, 95)*1000, percentile(latencies, 99)*1000, statuses))
+
+        lines.append('total {} requests in {:.1f} s, {:.1f} req/s'.format(total, elapsed, total / elapsed))
+
+        return lines
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of sorted values"""
+
+    if not values:
+        return 0
+
+    rank = max(math.ceil(percent / 100 * len(values)) - 1, 0)
+
+    return values[min(rank, len(values) - 1)]
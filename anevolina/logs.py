@@ -0,0 +1,16 @@
+'''
+This module has logging handlers for settings.LOGGING
+'''
+
+import logging
+import os
+
+
+class DirectoryFileHandler(logging.FileHandler):
+    """File handler which creates the directory of the log file when the file is opened,
+    so importing settings doesn't create anything"""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+
+        return super()._open()
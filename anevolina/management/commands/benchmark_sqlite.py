@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.utils import ConnectionHandler
+
+from anevolina.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent Project list reads alongside admin writes: the stock SQLite backend with a connection ' \
+           'per request against portfolio.sqlite3 with the configured CONN_MAX_AGE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help='Number of reading threads')
+        parser.add_argument('--seconds', type=float, default=5, help='Duration of every run')
+        parser.add_argument('--write-pause', type=float, default=0.01, help='Pause between admin writes')
+
+    def handle(self, *args, **options):
+        read_sql = str(Project.objects.all().query)
+        source = settings.DATABASES['default']['NAME']
+
+        with tempfile.TemporaryDirectory() as directory:
+            results = []
+            for tuned in (False, True):
+                path = os.path.join(directory, 'tuned.sqlite3' if tuned else 'stock.sqlite3')
+                shutil.copy(source, path)
+                results.append(self.run(path, read_sql, tuned, options))
+
+        (stock_reads, stock_writes), (tuned_reads, tuned_writes) = results
+        self.stdout.write('stock: {:.0f} reads/s, {:.0f} writes/s'.format(stock_reads, stock_writes))
+        self.stdout.write('tuned: {:.0f} reads/s, {:.0f} writes/s'.format(tuned_reads, tuned_writes))
+        self.stdout.write('read throughput x{:.2f}'.format(tuned_reads / max(stock_reads, 1)))
+
+    def connections(self, path, tuned):
+        """Django connections to the copy of the database - the configured backend or the stock one
+        without persistent connections. Every thread gets its own connection"""
+
+        database = dict(settings.DATABASES['default'], NAME=path)
+        if not tuned:
+            database.update(ENGINE='django.db.backends.sqlite3', CONN_MAX_AGE=0)
+
+        return ConnectionHandler({'default': database})
+
+    def run(self, path, read_sql, tuned, options):
+        """Run readers and one writer for the given time, return reads and writes per second"""
+
+        stop = threading.Event()
+        counts = {'reads': 0, 'writes': 0}
+        lock = threading.Lock()
+        connections = self.connections(path, tuned)
+
+        def execute(sql):
+            connection = connections['default']
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+                cursor.fetchall()
+            # The same as at the end of a request - closed unless CONN_MAX_AGE keeps it
+            connection.close_if_unusable_or_obsolete()
+
+        def read():
+            reads = 0
+            while not stop.is_set():
+                execute(read_sql)
+                reads += 1
+            connections['default'].close()
+            with lock:
+                counts['reads'] += reads
+
+        def write():
+            writes = 0
+            while not stop.is_set():
+                execute('UPDATE anevolina_project SET description = description WHERE id = '
+                        '(SELECT MIN(id) FROM anevolina_project)')
+                writes += 1
+                time.sleep(options['write_pause'])
+            connections['default'].close()
+            with lock:
+                counts['writes'] += writes
+
+        threads = [threading.Thread(target=read) for _ in range(options['readers'])]
+        threads.append(threading.Thread(target=write))
+
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        return counts['reads'] / options['seconds'], counts['writes'] / options['seconds']
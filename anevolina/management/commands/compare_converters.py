@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from anevolina.modules.differential import compare_lines, generate_lines
+
+
+class Command(BaseCommand):
+    help = 'Convert generated recipe lines with the legacy and the current converter and report minimized ' \
+           'lines which convert differently'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=5000, help='Number of generated lines')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the generator')
+        parser.add_argument('--file', help='Compare lines of this file instead of generated ones')
+        parser.add_argument('--tolerance', type=float, default=0,
+                            help='Ignore numbers which differ less than this relative tolerance')
+        parser.add_argument('--fail', action='store_true', help='Exit with an error if there are divergences')
+
+    def handle(self, *args, **options):
+        if options['file']:
+            with open(options['file']) as file:
+                lines = file.read().split('\n')
+        else:
+            lines = generate_lines(options['count'], options['seed'])
+
+        divergences = 0
+
+        for divergence in compare_lines(lines, tolerance=options['tolerance']):
+            divergences += 1
+            self.stdout.write('{!r}\n    minimized: {!r}\n    legacy:    {!r}\n    current:   {!r}'.format(
+                divergence.line, divergence.minimized, divergence.expected, divergence.actual))
+
+        self.stdout.write('{} divergences'.format(divergences))
+
+        if divergences and options['fail']:
+            raise CommandError('Converters diverge')
@@ -0,0 +1,29 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from anevolina.modules.tables import export_tables
+
+
+class Command(BaseCommand):
+    help = 'Export unit rules and item coefficients for converting simple lines in the browser. ' \
+           'The file name has the version of the tables, so it can be cached for good'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Directory for the file, tables/ in static files by default')
+
+    def handle(self, *args, **options):
+        output = options['output'] or os.path.join(settings.STATICFILES_DIRS[0], 'tables')
+        tables = export_tables()
+
+        os.makedirs(output, exist_ok=True)
+        path = os.path.join(output, 'conversion-tables.{}.json'.format(tables['version']))
+
+        with open(path, 'w') as file:
+            json.dump(tables, file, separators=(',', ':'))
+
+        vectors = sum(len(vectors) for vectors in tables['vectors'].values())
+        self.stdout.write('{}: {} profiles, {} items, {} vectors, {} bytes'.format(
+            path, len(tables['profiles']), len(tables['coefficients']), vectors, os.path.getsize(path)))
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from anevolina.loadtesting import LoadGenerator, endpoints, parse_mix, start_site, start_stub
+from anevolina.models import Project
+
+CONVERTER_PK = 3
+
+
+class Command(BaseCommand):
+    help = 'Drive the index, project pages and the converter (EN and RU) with concurrent requests and report ' \
+           'throughput and p50/p95/p99 latency per endpoint. Translation goes to a local stub, RU requests ' \
+           'answered in English are reported as convert_ru_shed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Site to test. By default the site is served in this process')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=500, help='Total number of requests')
+        parser.add_argument('--duration', type=float, help='Run for this many seconds instead of --requests')
+        parser.add_argument('--mix', default='index=4,project=3,convert_en=2,convert_ru=1',
+                            help='Relative weights of endpoints')
+        parser.add_argument('--stub-port', type=int, default=0, help='Port of the translation stub')
+        parser.add_argument('--stub-latency', type=float, default=0.2, help='Seconds the stub waits before answering')
+        parser.add_argument('--stub-error-rate', type=float, default=0, help='Part of stub answers which are 503')
+        parser.add_argument('--keep-limits', action='store_true',
+                            help='Keep converter rate limits of the served site, all requests come from one client')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        stub = start_stub(options['stub_port'], options['stub_latency'], options['stub_error_rate'])
+        stub_url = 'http://127.0.0.1:{}/'.format(stub.server_port)
+        base_url = options['url']
+        site = None
+
+        if base_url:
+            self.stdout.write('Translation stub at {} - start the site with TRANSLATION_SERVICE_URL={}'.format(
+                stub_url, stub_url))
+        else:
+            settings.TRANSLATION_SERVICE_URL = stub_url
+            if not options['keep_limits']:
+                settings.CONVERTER_RATE = settings.CONVERTER_BURST = 10 ** 9
+            site = start_site(get_wsgi_application())
+            base_url = 'http://127.0.0.1:{}'.format(site.server_port)
+
+        project_pks = [pk for pk in Project.objects.values_list('pk', flat=True) if pk != CONVERTER_PK]
+        generator = LoadGenerator(base_url, endpoints(project_pks, CONVERTER_PK), parse_mix(options['mix']),
+                                  options['concurrency'], options['requests'], options['duration'], options['seed'])
+
+        try:
+            elapsed = generator.run()
+        finally:
+            stub.shutdown()
+            if site:
+                site.shutdown()
+
+        for line in generator.report(elapsed):
+            self.stdout.write(line)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from anevolina.cards import render_card
+from anevolina.images import load_pil, make_variants
+from anevolina.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Make resized WebP and JPEG variants of all project images and render cards with them again. ' \
+           'Projects do it on save, this is for images which were added before'
+
+    def handle(self, *args, **options):
+        if load_pil() is None:
+            raise CommandError('Pillow is not installed')
+
+        for project in Project.objects.all():
+            description = make_variants(project.image)
+            render_card(project)
+
+            if description is None:
+                self.stdout.write('{}: no image {}'.format(project.title, project.image))
+            else:
+                widths = sorted({variant['width'] for variant in description['variants']})
+                self.stdout.write('{}: {}'.format(project.title, ', '.join('{}w'.format(width) for width in widths)))
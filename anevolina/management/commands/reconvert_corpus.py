@@ -0,0 +1,48 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from anevolina.conversions import RESULT_VERSION
+from anevolina.modules.converter import ARConverter
+from anevolina.modules.corpus import reconvert
+from anevolina.modules.profiles import DEFAULT_PROFILE, PROFILES
+
+
+class Command(BaseCommand):
+    help = 'Convert .txt recipes of the source directory to the output directory. Only recipes which changed, ' \
+           'use changed coefficients or were converted by another converter version are converted again. ' \
+           'An interrupted run continues from the last checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Directory with recipes')
+        parser.add_argument('output', help='Directory for converted recipes')
+        parser.add_argument('--profile', default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+        parser.add_argument('--manifest', help='Manifest file, manifest.json in the output directory by default')
+        parser.add_argument('--checkpoint', type=int, default=50, help='Save the manifest after this many recipes')
+        # Unlike web requests the batch has time - a line marked as not converted would be converted every run
+        parser.add_argument('--line-budget', type=float, default=0,
+                            help='CPU seconds one line may take, 0 - no limit (default)')
+        parser.add_argument('--force', action='store_true',
+                            help='Convert all recipes again, remove outputs even if no recipes are found')
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options['source']):
+            raise CommandError('{} is not a directory'.format(options['source']))
+        if options['checkpoint'] < 1:
+            raise CommandError('--checkpoint must be positive')
+        if options['line_budget'] < 0:
+            raise CommandError('--line-budget can\'t be negative')
+
+        def progress(path, action):
+            if options['verbosity'] > 1:
+                self.stdout.write('{}: {}'.format(path, action))
+
+        converter = ARConverter(options['profile'], line_budget=options['line_budget'])
+        report = reconvert(converter, options['source'], options['output'], RESULT_VERSION,
+                           options['manifest'], options['checkpoint'], options['force'], progress)
+
+        for path in report.incomplete:
+            self.stdout.write('{}: some lines were not converted in time, it will be converted again'.format(path))
+
+        self.stdout.write('{} converted, {} skipped, {} removed, {} incomplete'.format(
+            len(report.converted), len(report.skipped), len(report.removed), len(report.incomplete)))
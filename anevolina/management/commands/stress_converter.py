@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from anevolina.modules.concurrency import measure_scaling
+from anevolina.modules.converter import get_converter
+from anevolina.modules.differential import generate_lines
+from anevolina.modules.profiles import DEFAULT_PROFILE, PROFILES
+
+
+class Command(BaseCommand):
+    help = 'Convert generated recipe lines with one converter shared by several threads, ' \
+           'check that results are the same as in one thread and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', default='1,2,4,8', help='Comma separated numbers of threads')
+        parser.add_argument('--count', type=int, default=2000, help='Number of generated lines')
+        parser.add_argument('--repeat', type=int, default=3, help='How many times every line is converted')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the generator')
+        parser.add_argument('--profile', default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+
+    def handle(self, *args, **options):
+        thread_counts = [int(threads) for threads in options['threads'].split(',')]
+        lines = list(generate_lines(options['count'], options['seed']))
+        converter = get_converter(options['profile'])
+
+        self.stdout.write('{:>8} {:>10} {:>12} {:>8} {:>11}'.format('threads', 'seconds', 'lines/s', 'speedup',
+                                                                    'mismatches'))
+        base = None
+        mismatches = 0
+
+        for run in measure_scaling(converter, lines, thread_counts, options['repeat']):
+            base = base or run.elapsed
+            mismatches += run.mismatches
+            self.stdout.write('{:>8} {:>10.2f} {:>12.0f} {:>8.2f} {:>11}'.format(
+                run.threads, run.elapsed, run.lines / run.elapsed, base / run.elapsed, run.mismatches))
+
+        if mismatches:
+            raise CommandError('Threads converted {} lines differently'.format(mismatches))
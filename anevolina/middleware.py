@@ -0,0 +1,98 @@
+'''
+This module serves collected static files.
+It picks a precompressed version of the file the browser accepts and
+marks files with hashed names as immutable, so repeat visits don't request them at all.
+Other files are revalidated with ETag and Last-Modified and answered with 304 if they didn't change
+'''
+
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+class PrecompressedStaticMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.hashed_names = None
+
+    def __call__(self, request):
+        if settings.STATIC_ROOT and request.method in ('GET', 'HEAD') and request.path.startswith(settings.STATIC_URL):
+            response = self.serve(request, request.path[len(settings.STATIC_URL):])
+            if response:
+                return response
+
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        """Response for a collected static file or None if there is no such file"""
+
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except (SuspiciousFileOperation, ValueError):
+            return None
+
+        if not os.path.isfile(path):
+            return None
+
+        content_type, _ = mimetypes.guess_type(path)
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        encoding = None
+
+        for candidate, extension in ENCODINGS:
+            if candidate in accepted and os.path.isfile(path + extension):
+                encoding = candidate
+                path += extension
+                break
+
+        # Every encoding of the file is a different representation with its own ETag
+        stat = os.stat(path)
+        etag = '"{:x}-{:x}{}"'.format(int(stat.st_mtime), stat.st_size, '-' + encoding if encoding else '')
+        last_modified = int(stat.st_mtime)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+        if response is None:
+            response = FileResponse(open(path, 'rb'), content_type=content_type or 'application/octet-stream')
+            if encoding:
+                response['Content-Encoding'] = encoding
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = IMMUTABLE if self.is_hashed(name) else REVALIDATE
+
+        return response
+
+    def is_hashed(self, name):
+        """Only names from the staticfiles manifest have a hash of their content"""
+
+        if self.hashed_names is None:
+            self.hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+        return name in self.hashed_names
+
+
+def accepted_encodings(header):
+    """Encodings from the Accept-Encoding header, except ones with q=0"""
+
+    result = set()
+
+    for item in header.split(','):
+        encoding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            result.add(encoding.strip().lower())
+
+    return result
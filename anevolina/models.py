@@ -1,6 +1,10 @@
+import logging
+
 from django.db import models
 from portfolio import settings
 
+logger = logging.getLogger(__name__)
+
 # Create your models here.
 
 
@@ -17,3 +21,13 @@ class Project(models.Model):
         self.image = self.image.replace(settings.STATICFILES_DIRS[0], '')
 
         super().save(*args, **kwargs)
+
+        # Make image variants and render the card for the index page now, not on the next visit.
+        # The project is already saved - if it fails, the card is rendered on the next visit instead
+        from anevolina.cards import render_card
+        from anevolina.images import make_variants
+        try:
+            make_variants(self.image)
+            render_card(self)
+        except Exception:
+            logger.exception('The card of project %s was not rendered', self.pk)
@@ -0,0 +1,152 @@
+'''
+This module parses amounts found in recipe lines.
+Amounts are kept as exact fractions, so nothing is rounded until
+a converted value is finally written back to the line
+'''
+
+import re
+from fractions import Fraction
+from functools import lru_cache
+
+
+VULGAR_FRACTIONS = {'⅛': Fraction(1, 8), '¼': Fraction(1, 4), '⅓': Fraction(1, 3), '⅜': Fraction(3, 8),
+                    '½': Fraction(1, 2), '⅝': Fraction(5, 8), '⅔': Fraction(2, 3), '¾': Fraction(3, 4),
+                    '⅞': Fraction(7, 8), '⅕': Fraction(1, 5), '⅖': Fraction(2, 5), '⅗': Fraction(3, 5),
+                    '⅘': Fraction(4, 5), '⅙': Fraction(1, 6), '⅚': Fraction(5, 6)}
+
+DECIMAL_TEMPLATE = re.compile(r'\d+(?:[.,]\d+)?')
+DIGITS_TEMPLATE = re.compile(r'\d+')
+
+# Longer numbers are phone numbers, ids and such - they are left as they are
+MAX_AMOUNT_LENGTH = 20
+
+
+@lru_cache(maxsize=4096)
+def parse_amount(token):
+    ''' token - is a string in format 1 3/4, 1/2, 1½ or 2,5 - integer part
+    divided from the fraction by space symbol. The cache is shared by all lines and converters.
+
+    If fraction part is incomplete ( /8) or (8/ ) it's ignored
+    If some integer appears after fraction it's ignored
+    If integer appears after integer - first integer ignored (in a case '1 16 oz can')
+    '''
+
+    result = Fraction(0)
+
+    for position, part in enumerate(token.split()):
+        vulgar = VULGAR_FRACTIONS.get(part[-1])
+
+        if vulgar is not None:
+            whole = decimal_value(part[:-1]) if len(part) > 1 else Fraction(0)
+            if whole is None:
+                continue
+            if position > 0 and len(part) > 1:
+                return whole + vulgar
+            return result + whole + vulgar
+
+        if '/' in part:
+            numerator, _, denominator = part.partition('/')
+            if DIGITS_TEMPLATE.fullmatch(numerator) and DIGITS_TEMPLATE.fullmatch(denominator) \
+                    and int(denominator) > 0:
+                return result + Fraction(int(numerator), int(denominator))
+            continue
+
+        value = decimal_value(part)
+        if value is None:
+            continue
+
+        if position > 0:            # get rid of the previous part of double integer in a case '1 16 oz can'
+            result = value
+        else:
+            result += value
+
+    return result
+
+
+def find_amount_tokens(line):
+    """Find amounts in the line in one pass - the same as '\\d+[.,]\\d+|\\d*[ ]*\\d+[/]\\d+|\\d+' regexp,
+    but without backtracking, so it takes linear time for any line. Numbers longer than MAX_AMOUNT_LENGTH are skipped.
+    Returns a list of (amount, start, end), amounts are stripped"""
+
+    result = []
+    length = len(line)
+    position = 0
+
+    while position < length:
+        char = line[position]
+
+        if char.isdecimal():
+            start = position
+            end = digits_end(line, position)
+
+            if end + 1 < length and line[end] in '.,' and line[end + 1].isdecimal():  # 1.5 or 1,5
+                end = digits_end(line, end + 1)
+            else:
+                after_spaces = spaces_end(line, end)                                    # 1 3/4, 3/4 or 1
+                end = (after_spaces > end and fraction_end(line, after_spaces)) or fraction_end(line, start) or end
+
+            if end - start <= MAX_AMOUNT_LENGTH:
+                result.append((line[start:end], start, end))
+            position = end
+
+        elif char == ' ':
+            start = spaces_end(line, position)
+            end = fraction_end(line, start)
+
+            if end:
+                if end - start <= MAX_AMOUNT_LENGTH:
+                    result.append((line[start:end], start, end))
+                position = end
+            else:
+                position = start
+
+        else:
+            position += 1
+
+    return result
+
+
+def fraction_end(line, position):
+    """End of a fraction like '3/4' which starts at the position, None if there is no fraction"""
+
+    end = digits_end(line, position)
+
+    if end > position and end + 1 < len(line) and line[end] == '/' and line[end + 1].isdecimal():
+        return digits_end(line, end + 1)
+
+    return None
+
+
+def digits_end(line, position):
+    while position < len(line) and line[position].isdecimal():
+        position += 1
+
+    return position
+
+
+def spaces_end(line, position):
+    while position < len(line) and line[position] == ' ':
+        position += 1
+
+    return position
+
+
+def decimal_value(part):
+    """Exact value of a whole or decimal number with '.' or ',' as a separator. None if it isn't a number"""
+
+    if not DECIMAL_TEMPLATE.fullmatch(part):
+        return None
+
+    return Fraction(part.replace(',', '.'))
+
+
+def format_amount(value, precision=2):
+    """Render an amount the way it appears in a converted line - whole numbers without
+    a fractional part, the rest rounded to the given number of decimal places"""
+
+    if isinstance(value, Fraction):
+        if value.denominator == 1:
+            return str(value.numerator)
+        return str(round(float(value), precision))
+
+    return str(value)
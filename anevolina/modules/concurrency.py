@@ -0,0 +1,38 @@
+'''
+This module checks that one converter can be shared by many threads.
+The same lines are converted by a pool of threads and compared with
+a sequential run, the time of every run shows how conversion scales
+'''
+
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+Run = namedtuple('Run', ['threads', 'elapsed', 'lines', 'mismatches'])
+
+
+def convert_in_threads(converter, lines, threads, repeat=1):
+    """Convert every line repeat times in a pool of threads without a budget.
+    Returns converted lines in the order of lines for every repeat and elapsed seconds"""
+
+    tasks = list(lines) * repeat
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        converted = list(pool.map(lambda line: converter.process_line(line, 0), tasks, chunksize=16))
+
+    return converted, time.perf_counter() - started
+
+
+def measure_scaling(converter, lines, thread_counts, repeat=1):
+    """Run conversion with every number of threads and compare results with the sequential conversion.
+    Yields a Run for every number of threads"""
+
+    lines = list(lines)
+    expected = [converter.process_line(line, 0) for line in lines] * repeat
+
+    for threads in thread_counts:
+        converted, elapsed = convert_in_threads(converter, lines, threads, repeat)
+        mismatches = sum(1 for actual, line in zip(converted, expected) if actual != line)
+
+        yield Run(threads, elapsed, len(converted), mismatches)
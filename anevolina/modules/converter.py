@@ -1,73 +1,141 @@
 '''
 This module converts american measurements to russian.
 Starting from temperature - Fahrenheit to Celsius
-and finishing with cups/tsp/Tbsp to grams
+and finishing with cups/tsp/Tbsp to grams.
+Other target systems are described by profiles in profiles.py
 '''
 
 import re
 import json
 import os.path
 import logging
-import demoji
+import string
+import time
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
+
+from anevolina.modules.amounts import VULGAR_FRACTIONS, parse_amount, format_amount, find_amount_tokens
+from anevolina.modules.emojis import remove_emojis
+from anevolina.modules.profiles import PROFILES, DEFAULT_PROFILE
+from anevolina.modules.results import CONVERSION, WARNING, make_result
+
+# CPU seconds one line may take. Detection is linear, the budget guards the rest
+LINE_BUDGET = 0.05
+UNCONVERTED_MARKER = ' (not converted: the line is too long or complex)'
+
+RANGE_SEPARATOR = re.compile(r'\s*(to|-|x|\+)\s*')
+WORD_AFTER_NUMBER = re.compile(r'[ -]*([a-zA-Z]+)')
+
+# Vulgar fractions are spelled out, so '1⅝' becomes the mixed number '1 5/8'
+SYMBOLS_TO_REPLACE = dict({symbol: '{}/{}'.format(value.numerator, value.denominator)
+                           for symbol, value in VULGAR_FRACTIONS.items()},
+                          **{'°': '', '″': 'inch', "''": 'inch', '×': 'x', '–': '-'})
+
+# Replaced parts of the line are kept among indexes of words, so they move with every replacement
+EDITS = '<edits>'
+
+clock = getattr(time, 'thread_time', time.perf_counter)
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetExceeded(Exception):
+    """A line took more CPU time than its budget"""
+
+
+def check_deadline(deadline):
+    if deadline is not None and clock() > deadline:
+        raise BudgetExceeded()
+
+
+@lru_cache(maxsize=None)
+def load_coefficients():
+    """Read coefficients.json once per process - all converters share the same read-only dictionary"""
+
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+
+    with open(os.path.join(file_dir, 'coefficients.json'), 'r') as coefficients:
+        return read_only(json.load(coefficients))
+
+
+def read_only(value):
+    """Read-only view of a dictionary and all dictionaries inside it"""
+
+    if isinstance(value, dict):
+        return MappingProxyType({key: read_only(item) for key, item in value.items()})
+
+    return value
+
+
+@lru_cache(maxsize=None)
+def get_converter(profile_name=DEFAULT_PROFILE):
+    """Converter for the profile. It's built only once, so switching profiles between requests costs nothing"""
+
+    return ARConverter(profile_name)
 
 
 class ARConverter:
+    """A converter keeps only its configuration, which doesn't change after __init__.
+    Everything found in a line lives in components made for that line, so one converter
+    can convert lines in many threads at once"""
 
-    def __init__(self):
+    def __init__(self, profile_name=DEFAULT_PROFILE, line_budget=LINE_BUDGET):
         """
         - self.coefficients defines dictionary with key:value pairs as
         key = item (product), value - how many grams in 1 cup.
         Takes all values from coefficients.json file, which was made in make_constant_file.py
         module before initializing this class
 
-        - self.ml_measures defines volume of different tools in ml
+        - self.profile defines the target system: unit words, conversion factors, rounding
+        and output labels. See profiles.py
+
+        - self.line_budget defines how many CPU seconds one line may take, 0 - no limit
         """
 
-        self.logger = self.set_logger()
+        self.coefficients = load_coefficients()
+        self.profile = PROFILES[profile_name]
+        self.line_budget = line_budget
 
-        self.coefficients = dict()
-        file_dir = os.path.dirname(os.path.abspath(__file__))
+        # Download the base with emojies. Disable for tests
+        # demoji.download_codes()
 
-        with open(os.path.join(file_dir, 'coefficients.json'), 'r') as coefficients:
-            self.coefficients = json.load(coefficients)
+    def convert_many(self, lines, budget=None, line_budget=None):
+        """Convert lines one by one. When the budget for all lines is spent, the rest of them
+        is returned as is with a marker"""
 
-        self.ml_measures = {'tbsp': 15, 'gallon': 3875.4, 'pint': 473, 'quart': 946.4, 'cup': 240, 'stick': 120,
-                            'floz': 29.5}
+        deadline = clock() + budget if budget else None
+        result = []
 
-        self.units = [['cup', 'cups', 'c'], ['oz', 'ounce', 'ounces'], ['lb', 'lbs', 'pound', 'pounds'],
-                      ['grams', 'gr', 'gram', 'g'], ['tsp', 'teaspoon', 'ts'], ['tbsp', 'tablespoon', 'tablespoons', 'tbs'],
-                      ['gallon', 'gallons'], ['pint', 'pints'], ['quart', 'quarts'], ['stick', 'sticks'],
-                      ['ml', 'milliliters', 'milliliter'], ['floz'], ['inch', 'inches', 'in', "''"], ['cm', 'cantimeters']]
-        self.fahrenheit_names = ['f', 'fahrenheit', 'fahrenheits']
-        self.celsius_names = ['c', 'celsius']
+        for line in lines:
+            if deadline is not None and clock() > deadline:
+                result.append(self.unconverted(line) if line.strip() else make_result(line, line))
+            else:
+                result.append(self.convert(line, line_budget))
 
-        # Download the base with emojies. Disable for tests
-        # demoji.download_codes()
+        return result
 
-    def set_logger(self):
-        logger = logging.getLogger('ARConverter')
-        logger.setLevel(logging.INFO)
-        try:
-            os.mkdir('log')
-        except FileExistsError:
-            pass
+    def process_lines(self, lines, budget=None, line_budget=None):
+        """Converted text of lines, see convert_many"""
 
-        file_handler = logging.FileHandler('log/converter_log.log')
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        return [result.text for result in self.convert_many(lines, budget, line_budget)]
 
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+    def process_line(self, line, budget=None):
+        """Converted text of the line, see convert"""
 
-        return logger
+        return self.convert(line, budget).text
 
-    def process_line(self, line):
-        """The main procedure - handles with an initial line, call all procedures and returns lines with replaced
-        amounts and measures
+    def convert(self, line, budget=None):
+        """The main procedure - handles with an initial line, call all procedures and returns the result
+        with replaced amounts and measures, see results.py
 
         1. Delete all incorrect symbols or replace it with suitable value
         2. Check if the line is a link - we don't need to convert this line
         3. Allocate components in the line such as item, amount, units of measure and their indexes for accurate replacing
         4. Replace amounts and units of measure
+
+        Steps 3 and 4 have a budget in CPU seconds (self.line_budget by default). If the line takes longer,
+        it's returned as is with a marker
         """
 
         result = self.delete_incorrect_symbols(line)
@@ -76,20 +144,44 @@ class ARConverter:
         is_link = re.findall(is_link_templ, result)
 
         if is_link:
-            return result
+            return make_result(line, result)
+
+        budget = self.line_budget if budget is None else budget
+        deadline = clock() + budget if budget else None
+
+        try:
+            result, edits = self.convert_line(result, deadline)
+        except BudgetExceeded:
+            logger.info('LINE BUDGET EXCEEDED: ' + line[:100])
+            return self.unconverted(line)
+
+        return make_result(line, result, edits)
 
-        components = self.break_line(result)
+    def unconverted(self, line):
+        """The line as is with a marker that it wasn't converted"""
+
+        marker = (len(line) + 1, len(line) + len(UNCONVERTED_MARKER), WARNING, '')
+
+        return make_result(line, line + UNCONVERTED_MARKER, [marker], complete=False)
+
+    def convert_line(self, line, deadline=None):
+        """Find components of the cleaned line and replace amounts and units of measure.
+        Returns the new line and edits made in it. Raises BudgetExceeded after the deadline"""
+
+        result = line
+        components = self.break_line(result, deadline)
 
         if len(components['amount'].keys()) > 0:
             for key in components['amount']:
-                result = self.replace_in_line(result, key, components)
-        return result
+                check_deadline(deadline)
+                result = self.replace_in_line(result, key, components, deadline)
+        return result, components['index'][EDITS]
 
-    def replace_in_line(self, line, amount, components):
+    def replace_in_line(self, line, amount, components, deadline=None):
         """Call different functions for replacing repeated amount in line and single ones"""
 
         if len(components['index'][amount]) > 1:
-            result = self.replace_repeated_amount(line, amount, components)
+            result = self.replace_repeated_amount(line, amount, components, deadline)
         else:
             sub_dict = self.get_sub_dict_for_amount(amount, components)
             result = self.replace_not_repeated_amount(line, sub_dict, components)
@@ -106,11 +198,12 @@ class ARConverter:
         measure = sub_dict.get('measure')
         possible_fahrenheit = sub_dict.get('possible_F')
         all_indexes = components.get('index')
+        temperature = self.profile.temperature
 
         if possible_fahrenheit:
 
             old_measure = sub_dict.get('old_measure')
-            if old_measure in ['c', 'C']:
+            if old_measure and old_measure.lower() in temperature.warning_names:
                 result = self.update_farenheits(result, sub_dict, all_indexes, warning=True)
 
             if not measure:
@@ -119,46 +212,49 @@ class ARConverter:
             return result
 
         if measure:
+            rule = self.profile.rules.get(measure)
 
-            if measure == 'cup':
-                result = self.convert_cups_grams(result, sub_dict, all_indexes)
-
-            elif measure == 'oz':
-                result = self.convert_oz_grams(result, sub_dict, all_indexes)
+            if rule and rule.kind == 'density':
+                result = self.convert_by_density(result, sub_dict, all_indexes, rule)
 
-            elif measure == 'lb':
-                result = self.convert_lb_grams(result, sub_dict, all_indexes)
+            elif rule and not self.may_be_temperature(sub_dict):
+                result = self.convert_by_factor(result, sub_dict, all_indexes, rule)
 
-            elif measure in self.ml_measures.keys():
+            elif not rule and sub_dict.get('old_measure'):
 
-                result = self.convert_ml_gr(result, sub_dict, all_indexes)
-
-            elif measure == 'inch':
-                result = self.convert_inches_cm(result, sub_dict, all_indexes)
-
-            elif sub_dict.get('old_measure'):
-
-                result = self.replace_words(result, sub_dict['old_amount'], str(sub_dict['amount']), all_indexes,
+                result = self.replace_words(result, sub_dict['old_amount'], format_amount(sub_dict['amount']), all_indexes,
                                             amount_index)
 
                 result = self.replace_words(result, sub_dict['old_measure'], sub_dict['measure'], all_indexes,
                                             measure_index)
-        amount = sub_dict.get('amount')
+        amount = sub_dict.get('old_amount')
         possible_inch = components.get('possible_inch')
 
+        # inch_warning shows all possible inches at once and resets them
         for key in possible_inch:
-            if self.is_number_in_line(amount, key) and not measure:
-                result = self.inch_warning(result, possible_inch)
+            if not measure and possible_inch[key] and self.is_number_in_line(amount, key):
+                result = self.inch_warning(result, possible_inch, all_indexes)
 
         return result
 
-    def replace_repeated_amount(self, line, amount, components):
+    def may_be_temperature(self, sub_dict):
+        """Check if the unit is also a temperature word - like 'c' for cups and Celsius. Without an item
+        in the line it's rather a temperature, so it isn't converted by a factor"""
+
+        temperature = self.profile.temperature
+        old_measure = (sub_dict.get('old_measure') or '').lower()
+
+        return bool(temperature and old_measure in temperature.names + temperature.warning_names
+                    and not sub_dict.get('item'))
+
+    def replace_repeated_amount(self, line, amount, components, deadline=None):
         """Get several different subdictionaries for repeated amounts, and replace all amounts
         and unit measures one by one"""
 
         result = line
 
         for i in range(len(components['index'][amount])):
+            check_deadline(deadline)
             sub_dict = self.get_sub_dict_for_amount(amount, components, i)
             result = self.replace_not_repeated_amount(result, sub_dict, components)
         return result
@@ -167,9 +263,7 @@ class ARConverter:
         """Replace or delete special symbols from the line. Such as ½ or °
         For reasons of consistency."""
 
-        symbols_to_replace = {'⅛': '1/8', '½': '1/2', '⅓': '1/3', '¼': '1/4', '⅔': '2/3', '¾': '3/4', '°': '', '″': 'inch',
-                              "''": 'inch', '×': 'x', '–': '-'}
-        for key, value in symbols_to_replace.items():
+        for key, value in SYMBOLS_TO_REPLACE.items():
             line = line.replace(key, ' ' + value).strip()
         line = self.deEmojify(line)
 
@@ -178,16 +272,16 @@ class ARConverter:
     def deEmojify(self, line):
         """Delete all emojis from the line - JSON can't handle them and throw an error"""
 
-        line = demoji.replace(line)
+        line = remove_emojis(line)
 
         return line
 
-    def break_line(self, line):
+    def break_line(self, line, deadline=None):
         """Allocate amount, measure, indexes, item and another metrics and words in the line"""
 
         result = {}
 
-        numbers = self.find_and_check_numbers(line)
+        numbers = self.find_and_check_numbers(line, deadline)
         result.update(numbers)
 
         words = self.find_words(line)
@@ -210,47 +304,54 @@ class ARConverter:
         result.update({'words': words})
         return result
 
-    def find_and_check_numbers(self, line):
+    def find_and_check_numbers(self, line, deadline=None):
         """Find all numbers in a line and check words around them to detect a unit measure.
         Take care of double amounts such as '4-5 cups / 1 to 2 oz' to convert and replace them differently"""
 
         number_dict = {'amount': {}, 'measure': {}, 'old_measure': {},
-                       'possible_F': {}, 'index': {}, 'possible_inch':{}}
-        double_amounts = self.find_double_numbers(line, number_dict)
+                       'possible_F': {}, 'index': {EDITS: []}, 'possible_inch':{}}
+        tokens = find_amount_tokens(line)
+        double_amounts = self.find_double_numbers(line, number_dict, tokens)
 
-        self.check_for_single_amount(line, number_dict)
+        self.check_for_single_amount(line, number_dict, tokens, deadline)
 
         if len(double_amounts) > 0:
-            self.handle_double_amount(number_dict, double_amounts)
+            self.handle_double_amount(number_dict, double_amounts, deadline)
 
         return number_dict
 
-    def check_for_single_amount(self, line, number_dict):
+    def check_for_single_amount(self, line, number_dict, tokens=None, deadline=None):
         """Find single amounts in the line, their indexes for accurate replacing, units of measures and if they
-        are temperature degrees in Fahrenheit."""
+        are temperature degrees in Fahrenheit. Repeated amounts are checked once with all their positions"""
 
-        amounts = self.find_numbers(line)
+        tokens = find_amount_tokens(line) if tokens is None else tokens
+        positions = {}
 
-        if len(amounts) > 0:
-            for amount in amounts:
-                amount = amount.strip()
-                template = '(?<![\d/.,]){}(?![/.])'.format(amount)
-                self.find_position(amount, line, number_dict, template)
-                convert_amount = self.str_to_int_convert_amount(amount)
+        for amount, start, end in tokens:
+            positions.setdefault(amount, [])
+            # Parts of broken fractions and dates like '/4' or '4/' aren't replaced by their positions
+            if not self.touches_number(line, start, end, before='/.,', after='/.'):
+                positions[amount].append((start, end))
 
-                number_dict['amount'].update({amount: convert_amount})
+        for amount, amount_positions in positions.items():
+            check_deadline(deadline)
 
-                self.check_possible_fahrenheit(amount, convert_amount, number_dict)
-                self.look_around_number(line, amount, number_dict)
+            number_dict['index'].update({amount: amount_positions})
+            convert_amount = self.str_to_int_convert_amount(amount)
 
+            number_dict['amount'].update({amount: convert_amount})
+
+            self.check_possible_fahrenheit(amount, convert_amount, number_dict)
+            self.look_around_number(line, amount, number_dict, amount_positions)
 
         return
 
-    def handle_double_amount(self, number_dict, double_amounts):
+    def handle_double_amount(self, number_dict, double_amounts, deadline=None):
         """Copy subdictionary for amounts in two numbers ('4-5 cups', '4 to 5 cups' )
         to convert and replace both numbers with appropriate values"""
 
         for d_amount in double_amounts:
+            check_deadline(deadline)
             amounts = self.find_numbers(d_amount)
             for amount in amounts:
                 if self.get_sub_dict_for_amount(amount, number_dict).get('measure'):
@@ -290,8 +391,8 @@ class ARConverter:
                 return
 
 
-        for key in number_dict['amount']:
-            if key in amounts:
+        for key in dict.fromkeys(amounts):
+            if key in number_dict['amount']:
                 measure_full_amount = number_dict['measure'].get(full_amount)
                 old_measure_full_amount = number_dict['old_measure'].get(full_amount)
                 number_dict['measure'].update({key: measure_full_amount})
@@ -299,89 +400,102 @@ class ARConverter:
 
         return
 
-    def find_double_numbers(self, line, number_dict):
-        """Find numbers which go in pairs ex: '4 to 5 cups' """
+    def find_double_numbers(self, line, number_dict, tokens=None):
+        """Find numbers which go in triples or pairs ex: '9x13x2 inch', '4 to 5 cups'. A pair is looked for only
+        if there are two numbers left after triples with the same separator.
+        Only separators between neighbouring numbers are checked, so it takes one pass over the line"""
 
-        amounts = self.find_numbers(line)
+        tokens = find_amount_tokens(line) if tokens is None else tokens
+        separators = [self.find_separator(line, first, second) for first, second in zip(tokens, tokens[1:])]
         m_amounts = []
 
-        if len(amounts) >= 2:
-            split_words = ['to', '-', 'x', '\+']
-            for s_word in split_words:
-                m_amounts += self.find_multiple_amount(s_word, amounts, line, number_dict)
+        for s_word in ['to', '-', 'x', '+']:
+            multiple_amounts = []
+            in_triples = set()
+            i = 0
+
+            while i < len(separators) - 1:
+                if separators[i] == separators[i + 1] == s_word:
+                    multiple_amounts.append(line[tokens[i][1]:tokens[i + 2][2]])
+                    in_triples.update((i, i + 1, i + 2))
+                    i += 3
+                else:
+                    i += 1
+
+            left = [number for number in range(len(tokens)) if number not in in_triples]
+            if len(left) == 2 and left[1] == left[0] + 1 and separators[left[0]] == s_word:
+                multiple_amounts.append(line[tokens[left[0]][1]:tokens[left[1]][2]])
+
+            if s_word == 'x' and len(multiple_amounts) > 0:
+                number_dict['possible_inch'].update({key: True for key in multiple_amounts})
+
+            m_amounts += multiple_amounts
 
         return m_amounts
 
-    def find_multiple_amount(self, s_word, amounts, line, number_dict):
-        """Looking for triple and double amounts in the line"""
+    def find_separator(self, line, first, second):
+        """Separator between two neighbouring numbers - 'to', '-', 'x' or '+', None if there are other symbols"""
 
-        multiple_amounts = []
-        i = 0
+        match = RANGE_SEPARATOR.fullmatch(line, first[2], second[1])
 
-        if len(amounts) >= 3:
-            while i < len(amounts)-2:
-                triple_pattern = r'{}\s*{}\s*{}\s*{}\s*{}'.format(amounts[i], s_word, amounts[i + 1], s_word, amounts[i + 2])
-                m_amount = re.findall(triple_pattern, line)
-                multiple_amounts += m_amount
-                i += 1
-                if len(m_amount) > 0:
-                    amounts = amounts[0:i-1] + amounts[i+2:]
-                    i = 0
+        return match.group(1) if match else None
 
-        if len(amounts) == 2:
-            i = 0
-            while i < len(amounts)-1:
-                double_pattern = r'{}\s*{}\s*{}'.format(amounts[i], s_word, amounts[i + 1])
-                m_amount = re.findall(double_pattern, line)
-                multiple_amounts += m_amount
-                i += 1
-                if len(m_amount) > 0:
-                    amounts = amounts[0:i-1] + amounts[i+1:]
-                    i = 0
-        if s_word == 'x' and len(multiple_amounts) > 0:
-            number_dict['possible_inch'].update({key: True for key in multiple_amounts})
-
-        return multiple_amounts
-
-    def find_numbers(self, line, templates=None):
-        """Find numbers using regexp.
-        Search whole numbers, numbers with fractional part with '/', and real numbers with '.' or ',' as a separator
+    def find_numbers(self, line):
+        """Find numbers - whole numbers, numbers with fractional part with '/', and real numbers with '.' or ','
+        as a separator
         """
 
-        templates = templates or ['\d+[.,]\d+|\d*[ ]*\d+[/]\d+|\d+']
+        return [amount for amount, start, end in find_amount_tokens(line)]
 
-        for template in templates:
-            amounts = re.findall(r'{}'.format(template), line)
+    def look_around_number(self, line, amount, number_dict, positions=None):
+        """Find words around a number and check if they are unit measures"""
 
-            if len(amounts) > 0:
-                return amounts
+        if positions is None:
+            positions = [(start, end) for token, start, end in find_amount_tokens(line) if token == amount]
 
-        return []
+        left_words = [self.word_before(line, start) for start, end in positions
+                      if not self.touches_number(line, start, end, after='/.,')]
+        right_words = [self.word_after(line, end) for start, end in positions
+                       if not self.touches_number(line, start, end, before='/.,')]
 
-    def look_around_number(self, line, amount, number_dict):
-        """Find words around a number and check if they are unit measures"""
+        words = self.process_words_around_number(left_words + right_words, ['-'])
+
+        self.check_words_around_number(words, amount, number_dict, line)
 
-        p_s = ['', '-']
+        return words
 
-        left_words = []
-        right_words = []
+    def touches_number(self, line, start, end, before='', after=''):
+        """Check if the number at start:end is glued to a symbol of another number before or after it"""
 
-        for symbol in p_s:
+        return (start > 0 and line[start - 1] in before) or (end < len(line) and line[end] in after)
 
-            left_pattern = r'([a-zA-Z]*[ {}]*)'.format(symbol) + amount + '(?![/\d,.])'
-            right_pattern = r'(?<![\d/.,])' + amount + '[ {}]*([a-zA-Z]+)'.format(symbol)
+    def word_before(self, line, position):
+        """Word right before the position, only spaces and '-' can be between them.
+        A word right after another number belongs to that number ('350 F 1/2 hour'), so it's skipped"""
 
-            left_word = re.findall(left_pattern, line)
-            right_word = re.findall(right_pattern, line)
+        end = position
+        while end > 0 and line[end - 1] in ' -':
+            end -= 1
 
-            left_words += left_word
-            right_words += right_word
+        start = end
+        while start > 0 and line[start - 1] in string.ascii_letters:
+            start -= 1
 
-        words = self.process_words_around_number(left_words + right_words, p_s)
+        before = start
+        while before > 0 and line[before - 1] in ' -':
+            before -= 1
 
-        self.check_words_around_number(words, amount, number_dict, line)
+        if before > 0 and line[before - 1].isdecimal():
+            return ''
 
-        return words
+        return line[start:end]
+
+    def word_after(self, line, position):
+        """Word right after the position, only spaces and '-' can be between them"""
+
+        match = WORD_AFTER_NUMBER.match(line, position)
+
+        return match.group(1) if match else ''
 
     def process_words_around_number(self, words: list, symbols_for_delete: list):
         """Delete all excess symbols from words, repeated or empty words"""
@@ -403,25 +517,26 @@ class ARConverter:
 
         # Check if a word is measure
 
+        temperature = self.profile.temperature
+
         for word in words:
             word = word.strip()
-            for i in range(len(self.units)):
-                if word.lower() in self.units[i]:
-                    measure = self.units[i][0]
-                    if number_dict['measure'].get(amount) and word not in number_dict['old_measure'][amount]:
-                        number_dict['measure'][amount].append(measure)
-                        number_dict['old_measure'][amount].append(word)
-                    else:
-                        number_dict['measure'][amount] = [measure]
-                        number_dict['old_measure'][amount] = [word]
-
-                    template = r'(?=[ \d-]*){}|(?<=[ \d-]){}'.format(word, word)
+            measure = self.profile.aliases.get(word.lower())
+            if measure:
+                if number_dict['measure'].get(amount) and word not in number_dict['old_measure'][amount]:
+                    number_dict['measure'][amount].append(measure)
+                    number_dict['old_measure'][amount].append(word)
+                else:
+                    number_dict['measure'][amount] = [measure]
+                    number_dict['old_measure'][amount] = [word]
+
+                # The same unit after many numbers is looked up once
+                if word not in number_dict['index']:
+                    template = r'(?<![A-Za-z]){}(?![A-Za-z])'.format(word)
                     self.find_position(word, line, number_dict, template)
-                    break
-
 
         # Check if word is Fahrenheit word
-            if word.lower() in self.fahrenheit_names:
+            if temperature and word.lower() in temperature.names:
                 number_dict['possible_F'].update({amount: True})
 
 
@@ -440,7 +555,7 @@ class ARConverter:
             return [grams, True]
         else:
             message = 'INVALID PRODUCT: ' + ' '.join(words)
-            self.logger.info(message)
+            logger.info(message)
             return [cups, False]
 
     def calculate_grams_if_item(self, item, cups, words):
@@ -449,7 +564,7 @@ class ARConverter:
         if fail -  use {'': coefficient} in subdictionary.
         """
 
-        if type(self.coefficients[item]) == dict:
+        if isinstance(self.coefficients[item], Mapping):
             if len(words) > 0:
                 for spec in words:
                     spec_in_dic = self.coefficients[item].get(spec)
@@ -473,33 +588,37 @@ class ARConverter:
         words = sub_dict.get('words')
         old_amount = sub_dict['amount']
         index = sub_dict['index']
+        temperature = self.profile.temperature
 
         amount = self.fahrenheit_celsius(old_amount)
-        result = self.replace_words(line, str(old_amount), str(amount) + ' °C.', all_indexes, index)
-        convert = False
+        fahrenheit_words = [word for word in words if word.lower() in temperature.names]
 
-        for word in words:
-            if word.lower() in self.fahrenheit_names:
-                template = '[ \d-]{}[ ]'.format(word)
-                index = self.find_position(word, result, sub_dict, template, simple=True)
-                result = self.replace_words(result, word, '', all_indexes, index)
-                convert = True
-
-        if not convert:
-            for word in words:
-                if word.lower() in self.celsius_names:
-                    key = '(Possible mistake! {} - too much to be in Celsius. {}F = {}C)'.format(old_amount, old_amount,
-                                                                                                 amount)
-                    result = line + ' ' + key
+        # Too much to be in the target scale - the line stays as is with a note
+        if not fahrenheit_words and any(word.lower() in temperature.warning_names for word in words):
+            key = '(Possible mistake! {} - too much to be in {}. {}{} = {}{})'.format(
+                format_amount(old_amount), temperature.target_name, format_amount(old_amount),
+                temperature.source_symbol, amount, temperature.target_symbol)
+            return self.add_warning(line + ' ', key, all_indexes)
+
+        result = self.replace_words(line, sub_dict['old_amount'], str(amount) + temperature.label, all_indexes, index)
+
+        for word in fahrenheit_words:
+            template = '[ \d-]{}[ ]'.format(word)
+            index = self.find_position(word, result, sub_dict, template, simple=True)
+            result = self.replace_words(result, word, '', all_indexes, index)
 
         return result
 
-    def inch_warning(self, line, possible_inches):
+    def inch_warning(self, line, possible_inches, all_indexes=None):
         """If unit measure is not specify and there is a possibility we have inches there,
         show a warning message and convert all amounts in cm after the line,
         don't replace it in the line"""
 
         converted = []
+        rule = self.profile.rules.get('inch')
+
+        if not rule:
+            return line
 
         for key in possible_inches:
             inch_list = []
@@ -509,24 +628,33 @@ class ARConverter:
                 assert len(a) >= 2, 'wrong amount: {}'.format(key)
                 for value in a:
                     value = self.str_to_int_convert_amount(value)
-                    cm = self.in_cm(value)
-                    inch_list.append(str(value))
+                    cm = self.convert_amount(value, rule)
+                    inch_list.append(format_amount(value))
                     cm_list.append(str(cm))
-                converted.append('x'.join(inch_list) + ' in. = ' + 'x'.join(cm_list) + ' cm')
+                converted.append('x'.join(inch_list) + ' in. = ' + 'x'.join(cm_list) + ' ' + rule.label)
 
                 possible_inches.update({key: False})
 
         if len(converted) == 0:
             return line
 
-        result = line + '(measures might be in inches: ' + ', '.join(converted) + ')'
+        result = self.add_warning(line, '(measures might be in inches: ' + ', '.join(converted) + ')', all_indexes)
 
         return result
 
+    def add_warning(self, line, warning, all_indexes=None):
+        """Add the warning to the end of the line and remember where it is"""
+
+        if all_indexes is not None:
+            all_indexes[EDITS].append((len(line), len(line) + len(warning), WARNING, ''))
+
+        return line + warning
+
     # High-level conversion functions
 
-    def convert_cups_grams(self, line, sub_dict, all_indexes):
-        """Converts cups to grams and process result whether the conversion is succeed or failed"""
+    def convert_by_density(self, line, sub_dict, all_indexes, rule):
+        """Converts volume to weight with the item coefficient and process result whether
+        the conversion is succeed or failed"""
 
         result = line
         index = sub_dict['index']
@@ -534,127 +662,55 @@ class ARConverter:
 
         old_amount = sub_dict['old_amount']
 
-        cups_to_grams = self.cups_grams(sub_dict['item'], sub_dict['amount'], sub_dict['words'])
-        new_amount = str(round(cups_to_grams[0]))
+        cups_to_grams = self.cups_grams(sub_dict['item'], sub_dict['amount']*rule.factor, sub_dict['words'])
 
         if cups_to_grams[1]:  # if conversion is success
+            new_amount = str(self.round_amount(cups_to_grams[0], rule))
             result = self.replace_words(result, old_amount, new_amount, all_indexes, index)
 
-            result = self.replace_words(result, sub_dict['old_measure'], 'grams', all_indexes, index_m)
-
-        return result
-
-    def convert_ml_gr(self, line, sub_dict, all_indexes):
-        """Calculates proportion for volume in self.ml_measures and converts cups to grams"""
-
-        cups_in_measure = self.ml_cups(sub_dict['measure'])
-        cups = sub_dict['amount']*cups_in_measure
-        sub_dict.update({'amount': cups})
-
-        result = self.convert_cups_grams(line, sub_dict, all_indexes)
-
-        return result
-
-    def convert_oz_grams(self, line, sub_dict, all_indexes):
-        """Convert oz to grams and replace it in the line"""
-
-        index = sub_dict.get('index')
-        index_m = sub_dict.get('index_m')
-
-        grams = self.oz_grams(sub_dict['amount'])
-        result = self.replace_words(line, sub_dict['old_amount'], str(grams), all_indexes, index)
-
-        result = self.replace_words(result, sub_dict['old_measure'], 'grams', all_indexes, index_m)
-
-        return result
-
-    def convert_lb_grams(self, line, sub_dict, all_indexes):
-        """Convert lb to grams and replace it in the line"""
-
-        index = sub_dict.get('index')
-        index_m = sub_dict.get('index_m')
-
-        grams = self.lb_grams(sub_dict['amount'])
-        result = self.replace_words(line, str(sub_dict['old_amount']), str(grams), all_indexes, index)
-
-        result = self.replace_words(result, sub_dict['old_measure'], 'grams', all_indexes, index_m)
+            result = self.replace_words(result, sub_dict['old_measure'], rule.label, all_indexes, index_m)
 
         return result
 
-    def convert_inches_cm(self, line, sub_dict, all_indexes):
-        """Convert inches to cm, replace in the line"""
+    def convert_by_factor(self, line, sub_dict, all_indexes, rule):
+        """Convert amount with the factor from the profile rule, replace amount and measure in the line"""
 
         index = sub_dict.get('index')
         index_m = sub_dict.get('index_m')
 
-        cm = self.in_cm(sub_dict['amount'])
-        result = self.replace_words(line, str(sub_dict['old_amount']), str(cm), all_indexes, index)
-        result = self.replace_words(result, sub_dict['old_measure'], 'cm', all_indexes, index_m)
+        new_amount = self.convert_amount(sub_dict['amount'], rule)
+        result = self.replace_words(line, str(sub_dict['old_amount']), str(new_amount), all_indexes, index)
+        result = self.replace_words(result, sub_dict['old_measure'], rule.label, all_indexes, index_m)
 
         return result
 
     # Simple one-line additional functions
 
     def fahrenheit_celsius(self, temperature):
-        return round((temperature - 32)*5/9)
+        rule = self.profile.temperature
+        return round((temperature - rule.base)*rule.scale + rule.shift)
 
-    def oz_grams(self, weight):
-        return round(weight*28.35)
+    def convert_amount(self, amount, rule):
+        return self.round_amount(amount*rule.factor, rule)
 
-    def lb_grams(self, weight):
-        return round(weight*453.6)
+    def round_amount(self, value, rule):
+        """Round converted value according to the rule. If result is small - round it to more decimal places"""
 
-    def ml_cups(self, measure):
-        """Calculates coefficient(proportion) for volume measures to cups"""
+        if rule.fine_below is not None and value <= rule.fine_below:
+            return float(round(value, rule.fine_precision))
 
-        result = self.ml_measures[measure]/self.ml_measures['cup']
+        if rule.precision:
+            return float(round(value, rule.precision))
 
-        return result
-
-    def in_cm(self, inches):
-        """Calculates centimeters from inches. If result is small - round it to 2 decimal places"""
-
-        result = inches*2.54
-
-        if result <= 5:
-            return round(result, 2)
-
-        return round(result)
+        return round(value)
 
     # Auxiliary functions
     def str_to_int_convert_amount(self, amount):
-        ''' amount - is a string in format 1 3/4 or 1/2 - integer part
-        divided from the fraction by space symbol
-        If fraction part is incomplete ( /8) or (8/ ) it's ignored
-
-        If some integer appears after fraction it's ignored
-        If integer appears after integer - first integer ignored (in a case '1 16 oz can')
+        ''' amount - is a string in format 1 3/4, 1/2 or 1,5. Returns an exact Fraction,
+        parsed amounts are memoized in parse_amount and shared between lines
         '''
 
-
-        string_numbers = amount.split()
-        result = 0
-
-        for i in range(len(string_numbers)):
-            if '/' in string_numbers[i]:
-                fraction_numbers = string_numbers[i].split('/')
-                try:
-                    result += round(int(fraction_numbers[0])/int(fraction_numbers[1]), 2)
-                    return result
-                except:
-                    message = 'Error in fraction' + str(string_numbers[i])
-                    self.logger.info(message)
-                    pass
-            elif i > 0:                 # get rid of the previous part of double integer in a case '1 16 oz can'
-                result = int(string_numbers[i])
-
-            elif ',' in string_numbers[i] or '.' in string_numbers[i]:
-                string_numbers[i] = string_numbers[i].replace(',', '.')
-                result += float(string_numbers[i])
-
-            else:
-                result += int(string_numbers[i])
-        return result
+        return parse_amount(amount.strip())
 
     def get_sub_dict_for_amount(self, amount, whole_dict, index=0):
         """Extract sub dictionary for the particular amount as a key value in all sub dictionaries
@@ -696,9 +752,12 @@ class ARConverter:
 
     def check_possible_fahrenheit(self, amount, convert_amount, number_dict):
         """We consider a number as a possible fahrenheit if it's larger than 270 (because recipes with this temperature
-        are quite rare)"""
+        are quite rare). The threshold comes from the profile, some profiles don't have it at all"""
+
+        temperature = self.profile.temperature
+        threshold = temperature.threshold if temperature else None
 
-        if convert_amount > 270:
+        if threshold is not None and convert_amount > threshold:
             number_dict['possible_F'].update({amount: True})
         else:
             number_dict['possible_F'].update({amount: False})
@@ -720,7 +779,7 @@ class ARConverter:
             end = first[1]
 
         else:
-            pre_index = re.finditer(what, line)
+            pre_index = re.finditer(re.escape(what), line)
             try:
                 indexes = [(pos.start(0), pos.end(0)) for pos in pre_index]
                 start = indexes[0][0]
@@ -730,34 +789,35 @@ class ARConverter:
                 result = line.replace(what, to_what)
                 return result
 
-        result = line[:start] + line[start:end].replace(what, to_what) + line[end:]
+        replaced = line[start:end].replace(what, to_what)
+        result = line[:start] + replaced + line[end:]
         self.update_all_indexes_after_replacement(what, to_what, start, end, all_indexes)
 
+        if replaced != line[start:end] and EDITS in all_indexes:
+            all_indexes[EDITS].append((start, start + len(replaced), CONVERSION, line[start:end]))
+
         return result
 
     def update_all_indexes_after_replacement(self, old, new, start, end, all_indexes):
         """Updates all indexes for a line"""
 
         for key in all_indexes:
-            for value in all_indexes[key]:
+            for v_index, value in enumerate(all_indexes[key]):
                 if value[0] >= start and value[1] > end:
-                    v_index = all_indexes[key].index(value)
-                    new_index = self.get_new_index(old, new, value)
-                    all_indexes[key][v_index] = new_index
-        pass
+                    all_indexes[key][v_index] = self.get_new_index(old, new, value)
 
     def get_new_index(self, old, new, index):
         """Updates particular given index as a tuple"""
 
         shift = len(str(new)) - len(str(old))
-        new_index = index[0] + shift, index[1] + shift
+        new_index = (index[0] + shift, index[1] + shift) + tuple(index[2:])
 
         return new_index
 
     def is_number_in_line(self, amount, string):
         """Check if the given multiple number exist in line after all replacement"""
 
-        pattern = r'(?<![\d/.,])\s*{}\s*[^\d/]'.format(amount)
+        pattern = r'(?<![\d/.,]){}\s*[^\d/]'.format(re.escape(amount))
         match = re.findall(pattern, string)
         if len(match) > 0:
             return True
@@ -0,0 +1,143 @@
+'''
+This module converts a corpus of recipes incrementally.
+Every recipe file is converted to a file with the same relative path, and a manifest
+keeps for each of them a hash of the text, a version of the coefficients the recipe uses
+and a version of the converter. A recipe is converted again only when one of them changes,
+so an edit of one item in coefficients.json touches only recipes mentioning that item.
+The manifest is saved every few recipes - an interrupted run continues where it stopped
+'''
+
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+
+from anevolina.modules.tables import export_profile, plain
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_FORMAT = 1
+
+WORD = re.compile(r'[A-Za-z]+')
+
+Report = namedtuple('Report', ['converted', 'skipped', 'removed', 'incomplete'])
+
+
+def fingerprint(value):
+    content = value if isinstance(value, str) else json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+
+def converter_version(converter, release):
+    """Version of the conversion itself - the release of the converter code and the target profile"""
+
+    return fingerprint({'release': release, 'profile': export_profile(converter.profile)})
+
+
+def coefficients_version(text, coefficients):
+    """Version of the coefficients of items mentioned in the text. Other items don't change its conversion"""
+
+    words = {word.lower() for word in WORD.findall(text)}
+
+    return fingerprint({item: plain(coefficients[item]) for item in sorted(words) if item in coefficients})
+
+
+def load_manifest(path):
+    """{relative path: entry}, empty if there is no manifest yet"""
+
+    try:
+        with open(path) as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        return {}
+
+    return manifest['entries'] if manifest.get('format') == MANIFEST_FORMAT else {}
+
+
+def save_manifest(entries, path):
+    """Write the manifest to a temporary file and replace the old one, so it's never half written"""
+
+    write_atomically(path, json.dumps({'format': MANIFEST_FORMAT, 'entries': entries}, indent=1, sort_keys=True))
+
+
+def write_atomically(path, text):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = path + '.tmp'
+
+    with open(temporary, 'w', encoding='utf-8') as file:
+        file.write(text)
+
+    os.replace(temporary, path)
+
+
+def find_recipes(source, suffix='.txt'):
+    """Relative paths of recipe files in the source directory, in a stable order"""
+
+    paths = []
+
+    for directory, _, files in os.walk(source):
+        for name in files:
+            if name.endswith(suffix):
+                paths.append(os.path.relpath(os.path.join(directory, name), source))
+
+    return sorted(paths)
+
+
+def reconvert(converter, source, output, release, manifest_path=None, checkpoint=50, force=False, progress=None):
+    """Convert recipes from source to output which changed since the last run. Results are written
+    to the same relative paths in output. progress(path, action) is called for every recipe.
+    Outputs of deleted recipes are removed, but only if some recipes are left or force is set.
+    Returns a Report with lists of paths"""
+
+    manifest_path = manifest_path or os.path.join(output, MANIFEST_NAME)
+    entries = load_manifest(manifest_path)
+    version = converter_version(converter, release)
+    report = Report([], [], [], [])
+    recipes = find_recipes(source)
+
+    try:
+        for path in recipes:
+            with open(os.path.join(source, path), encoding='utf-8') as file:
+                text = file.read()
+
+            entry = {'hash': fingerprint(text), 'coefficients': coefficients_version(text, converter.coefficients),
+                     'converter': version, 'output': path}
+
+            if not force and entries.get(path) == dict(entry, complete=True) \
+                    and os.path.isfile(os.path.join(output, path)):
+                report.skipped.append(path)
+                action = 'skipped'
+            else:
+                results = converter.convert_many(text.split('\n'))
+                write_atomically(os.path.join(output, path), '\n'.join(result.text for result in results))
+
+                # Lines over the budget are marked, such recipes are converted again next time
+                entry['complete'] = all(result.complete for result in results)
+                entries[path] = entry
+                (report.converted if entry['complete'] else report.incomplete).append(path)
+                action = 'converted'
+
+                if len(report.converted + report.incomplete) % checkpoint == 0:
+                    save_manifest(entries, manifest_path)
+
+            if progress:
+                progress(path, action)
+
+        # No recipes at all is rather a wrong directory than a deleted corpus
+        if recipes or force:
+            for path in sorted(set(entries) - set(recipes)):
+                remove_output(output, entries.pop(path)['output'])
+                report.removed.append(path)
+
+    finally:
+        save_manifest(entries, manifest_path)
+
+    return report
+
+
+def remove_output(output, path):
+    try:
+        os.remove(os.path.join(output, path))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,207 @@
+'''
+This module compares the current converter with the legacy reference implementation.
+It generates random recipe lines - numbers, fractions, ranges, units, items and emojis,
+converts them with both engines and reduces every line with a different result
+to the smallest line which still converts differently
+'''
+
+import random
+import re
+from collections import namedtuple
+from collections.abc import Mapping
+
+from anevolina.modules.amounts import VULGAR_FRACTIONS
+from anevolina.modules.converter import get_converter, load_coefficients
+from anevolina.modules.profiles import AMERICAN_UNITS, FAHRENHEIT_NAMES
+
+Divergence = namedtuple('Divergence', ['line', 'minimized', 'expected', 'actual'])
+
+RANGE_SEPARATORS = ['-', ' - ', ' to ', 'x', ' x ', '+', ' ']
+FILLER_WORDS = ['mix', 'bake', 'at', 'for', 'minutes', 'and', 'or', 'of', 'a', 'pan', 'about', 'degrees', 'packed',
+                '(', ')', ',', '.', ':']
+EMOJIS = ['🍰', '🥚', '🔥', '🧈', '🍫']
+
+NUMBER_TEMPLATE = re.compile(r'(\d+(?:\.\d+)?)')
+
+_legacy_converter = None
+
+
+def legacy_converter():
+    """Reference converter, created only once - every instance adds a handler to the log"""
+
+    global _legacy_converter
+
+    if _legacy_converter is None:
+        from anevolina.modules.legacy_converter import ARConverter
+        _legacy_converter = ARConverter()
+
+    return _legacy_converter
+
+
+def convert(converter, line):
+    """Result of the conversion or the exception it raised, so failures can be compared too"""
+
+    try:
+        return converter.process_line(line)
+    except Exception as error:
+        return '{}: {}'.format(type(error).__name__, error)
+
+
+def same_results(expected, actual, tolerance=0):
+    """Results are the same if they differ only in numbers and the difference is within
+    the relative tolerance - e.g. rounding of fractions before or after conversion"""
+
+    if expected == actual:
+        return True
+
+    if not tolerance:
+        return False
+
+    expected_parts = NUMBER_TEMPLATE.split(expected)
+    actual_parts = NUMBER_TEMPLATE.split(actual)
+
+    if len(expected_parts) != len(actual_parts) or expected_parts[::2] != actual_parts[::2]:
+        return False
+
+    for first, second in zip(expected_parts[1::2], actual_parts[1::2]):
+        first, second = float(first), float(second)
+        if abs(first - second) > tolerance*max(abs(first), abs(second), 1):
+            return False
+
+    return True
+
+
+def find_divergence(line, reference=None, candidate=None, tolerance=0):
+    """Divergence for the line or None if both engines agree"""
+
+    reference = reference or legacy_converter()
+    candidate = candidate or get_converter()
+
+    expected = convert(reference, line)
+    actual = convert(candidate, line)
+
+    if same_results(expected, actual, tolerance):
+        return None
+
+    return Divergence(line, line, expected, actual)
+
+
+def minimize(line, diverges):
+    """Shrink the line while diverges(line) stays True - first drop groups of words, then single characters"""
+
+    words = line.split(' ')
+    chunks = 2
+
+    while len(words) > 1:
+        size = -(-len(words) // chunks)
+        for start in range(0, len(words), size):
+            candidate = words[:start] + words[start + size:]
+            if candidate and diverges(' '.join(candidate)):
+                words = candidate
+                chunks = max(chunks - 1, 2)
+                break
+        else:
+            if chunks >= len(words):
+                break
+            chunks = min(chunks*2, len(words))
+
+    result = ' '.join(words)
+    position = 0
+
+    while position < len(result):
+        candidate = result[:position] + result[position + 1:]
+        if candidate.strip() and diverges(candidate):
+            result = candidate
+        else:
+            position += 1
+
+    return result
+
+
+def random_amount(generator):
+    kind = generator.randrange(5)
+
+    if kind == 0:
+        return str(generator.randint(0, 500))
+
+    if kind == 1:
+        return '{}{}{}'.format(generator.randint(0, 20), generator.choice('.,'), generator.randint(0, 99))
+
+    if kind == 2:
+        return '{}/{}'.format(generator.randint(1, 7), generator.choice([2, 3, 4, 8, 0]))
+
+    if kind == 3:
+        return '{} {}/{}'.format(generator.randint(1, 5), generator.randint(1, 3), generator.choice([2, 3, 4]))
+
+    prefix = str(generator.randint(1, 3)) if generator.random() < 0.5 else ''
+    return prefix + generator.choice(sorted(VULGAR_FRACTIONS))
+
+
+def random_phrase(generator, items):
+    kind = generator.randrange(6)
+
+    if kind == 0:
+        return generator.choice(FILLER_WORDS)
+
+    if kind == 1:
+        return generator.choice(EMOJIS)
+
+    if kind == 2:
+        name = generator.choice(FAHRENHEIT_NAMES + ('°F', 'F'))
+        return '{} {}'.format(generator.randint(250, 480), name)
+
+    amount = random_amount(generator)
+    if kind == 3:
+        amount += generator.choice(RANGE_SEPARATORS) + random_amount(generator)
+
+    unit = generator.choice(generator.choice(AMERICAN_UNITS))
+    unit = unit.upper() if generator.random() < 0.1 else unit
+
+    item = generator.choice(items)
+    spec = items_specification(generator, item)
+
+    return ' '.join(word for word in [amount, unit, spec, item] if word)
+
+
+def items_specification(generator, item):
+    coefficient = load_coefficients()[item]
+
+    if isinstance(coefficient, Mapping) and generator.random() < 0.5:
+        return generator.choice(sorted(coefficient))
+
+    return ''
+
+
+def generate_lines(count, seed=0):
+    """Random recipe lines, the same for the same seed"""
+
+    generator = random.Random(seed)
+    items = sorted(load_coefficients())
+
+    for _ in range(count):
+        phrases = [random_phrase(generator, items) for _ in range(generator.randint(1, 4))]
+        yield ' '.join(phrases)
+
+
+def compare_lines(lines, reference=None, candidate=None, tolerance=0):
+    """Divergences for the lines, each minimized and reported once"""
+
+    reference = reference or legacy_converter()
+    candidate = candidate or get_converter()
+    seen = set()
+
+    def diverges(line):
+        return find_divergence(line, reference, candidate, tolerance) is not None
+
+    for line in lines:
+        divergence = find_divergence(line, reference, candidate, tolerance)
+        if divergence is None:
+            continue
+
+        minimized = minimize(line, diverges)
+        if minimized in seen:
+            continue
+        seen.add(minimized)
+
+        smallest = find_divergence(minimized, reference, candidate, tolerance)
+        yield divergence._replace(minimized=minimized, expected=smallest.expected, actual=smallest.actual)
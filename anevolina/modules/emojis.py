@@ -0,0 +1,24 @@
+'''
+This module removes emojis from lines.
+demoji and its emoji base are loaded only when the first line is processed
+'''
+
+from functools import lru_cache
+from importlib import import_module
+
+
+@lru_cache(maxsize=None)
+def load_demoji():
+    """Import demoji on the first call and compile its emoji pattern.
+    The base must be downloaded beforehand with demoji.download_codes()"""
+
+    demoji = import_module('demoji')
+    demoji.set_emoji_pattern()
+
+    return demoji
+
+
+def remove_emojis(line):
+    """Delete all emojis from the line"""
+
+    return load_demoji().replace(line)
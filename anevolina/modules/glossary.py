@@ -0,0 +1,141 @@
+'''
+This module translates predictable recipe lines without a remote translator.
+glossary.json keeps a table per language - stock cooking phrases and warnings of the converter,
+headings, units and ingredients from coefficients.json. Every kind has one fixed form,
+so a line is translated here only if every word of it is covered and stands where that form is right:
+units after a number, ingredients (in the genitive) after a unit, headings as the whole line.
+Other lines are left for the remote translator.
+Units which agree with a number have three forms - for 1, for 2-4 and for 5 and more
+'''
+
+import json
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Words like 'all-purpose' are one word. 'C' and 'F' right after '°' are kept as they are
+WORD_TEMPLATE = re.compile(r"((?<!°)[A-Za-z]+(?:[-'][A-Za-z]+)*)")
+
+# The number at the end of a text, like '2', '1/2' or '25-30'. Only the tail of the text is searched
+NUMBER_BEFORE = re.compile(r'(\d+)([.,/]\d+)?$')
+NUMBER_TAIL = 20
+
+PHRASE, HEADING, UNIT, INGREDIENT = 'phrases', 'headings', 'units', 'ingredients'
+
+# Ingredients go on after these words - '1 cup sugar or honey'
+INGREDIENT_CONNECTORS = ('and', 'or')
+
+Glossary = namedtuple('Glossary', ['phrases', 'longest'])
+Entry = namedtuple('Entry', ['kind', 'translation'])
+
+
+@lru_cache(maxsize=None)
+def load_glossary(dest):
+    """Table for the language compiled to {phrase: Entry}, None if there isn't one.
+    Read once per process"""
+
+    file_dir = os.path.dirname(os.path.abspath(__file__))
+
+    with open(os.path.join(file_dir, 'glossary.json'), 'r', encoding='utf-8') as glossary:
+        table = json.load(glossary).get(dest)
+
+    if not table:
+        return None
+
+    phrases = {' '.join(phrase.lower().split()): Entry(kind, translation if isinstance(translation, str)
+                                                        else tuple(translation))
+               for kind in (PHRASE, HEADING, UNIT, INGREDIENT) for phrase, translation in table[kind].items()}
+
+    return Glossary(phrases, max(len(phrase.split()) for phrase in phrases))
+
+
+def translate_line(line, glossary):
+    """Translate the line phrase by phrase, the longest known phrase wins.
+    Numbers and punctuation stay as they are. Returns None if some word is unknown
+    or its fixed form doesn't fit its place in the line"""
+
+    # [text, word, text, word, ..., text]
+    parts = WORD_TEMPLATE.split(line)
+    result = [parts[0]]
+    position = 1
+    after_unit = False                  # the last words were a unit and its ingredients
+
+    while position < len(parts):
+        words = len(parts[position:]) // 2
+
+        for length in range(min(glossary.longest, words), 0, -1):
+            end = position + 2*length - 1
+
+            # Words of a phrase are separated only by spaces
+            if any(separator.strip() for separator in parts[position + 1:end:2]):
+                continue
+
+            phrase = ' '.join(word.lower() for word in parts[position:end:2])
+            after = parts[end]
+
+            # Abbreviations like 'in.' are kept with their dot
+            if after.startswith('.') and phrase + '.' in glossary.phrases:
+                (kind, translation), after = glossary.phrases[phrase + '.'], after[1:]
+            elif phrase in glossary.phrases:
+                kind, translation = glossary.phrases[phrase]
+            else:
+                continue
+
+            if kind == UNIT:
+                number = NUMBER_BEFORE.search(result[-1].rstrip()[-NUMBER_TAIL:])
+                if number is None:
+                    return None
+                if isinstance(translation, tuple):
+                    translation = plural_form(translation, number)
+                after_unit = True
+
+            elif kind == INGREDIENT and not after_unit:                     # 'Mix flour', 'Sugar'
+                return None
+
+            elif kind == HEADING and (position > 1 or end < len(parts) - 1):
+                return None
+
+            elif kind == PHRASE:
+                after_unit = after_unit and phrase in INGREDIENT_CONNECTORS
+
+            if not translation:             # articles are dropped together with the space after them
+                after = after.lstrip(' ')
+            elif parts[position][0].isupper():
+                translation = translation[0].upper() + translation[1:]
+            break
+        else:
+            return None
+
+        result.extend([translation, after])
+        position = end + 1
+
+    return ''.join(result)
+
+
+def plural_form(forms, number):
+    """One of (one, few, many) forms of a noun which agrees with the number matched by NUMBER_BEFORE"""
+
+    one, few, many = forms
+
+    if number.group(2):                 # 1/2 стакана, 2,5 стакана
+        return few
+
+    value = int(number.group(1))
+
+    if value % 10 == 1 and value % 100 != 11:
+        return one
+    if 2 <= value % 10 <= 4 and not 12 <= value % 100 <= 14:
+        return few
+    return many
+
+
+def translate_known_lines(lines, dest):
+    """Translations of lines covered by the glossary, None for the rest"""
+
+    glossary = load_glossary(dest)
+
+    if glossary is None:
+        return [None] * len(lines)
+
+    return [translate_line(line, glossary) for line in lines]
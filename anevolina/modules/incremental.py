@@ -0,0 +1,79 @@
+'''
+This module converts only changed lines of a recipe.
+The page sends hashes of all its lines and the text of new or changed lines only,
+the answer is a patch {line index: converted line as results.as_dict}
+'''
+
+from html import escape
+
+from anevolina.modules.results import as_dict
+
+
+class PatchError(ValueError):
+    pass
+
+
+def line_hash(line):
+    """32-bit FNV-1a hash of the utf-8 encoded line as 8 hex digits. The page computes the same in javascript"""
+
+    result = 0x811c9dc5
+
+    for byte in line.encode('utf-8'):
+        result = ((result ^ byte) * 0x01000193) & 0xffffffff
+
+    return '{:08x}'.format(result)
+
+
+def read_changed_lines(data, max_lines, max_chars):
+    """Check the request {'hashes': [...], 'lines': {'index': 'text'}} and return number of lines
+    in the recipe and a dictionary {index: text} of changed lines"""
+
+    if not isinstance(data, dict) or not isinstance(data.get('hashes'), list) \
+            or not isinstance(data.get('lines'), dict):
+        raise PatchError('Expected hashes of all lines and a dictionary of changed lines')
+
+    hashes = data['hashes']
+    lines = data['lines']
+
+    if len(hashes) > max_lines:
+        raise PatchError('The recipe is too long: {} lines, maximum is {}'.format(len(hashes), max_lines))
+
+    if sum(len(line) for line in lines.values() if isinstance(line, str)) > max_chars:
+        raise PatchError('Too many changes at once, maximum is {} characters'.format(max_chars))
+
+    changed = {}
+
+    for key, line in lines.items():
+        index = int(key) if key.isdigit() else -1
+
+        if not 0 <= index < len(hashes) or not isinstance(line, str):
+            raise PatchError('Unknown line: {}'.format(key))
+
+        if line_hash(line) != hashes[index]:
+            raise PatchError('Line {} doesn\'t match its hash'.format(key))
+
+        changed[index] = line
+
+    return len(hashes), changed
+
+
+def convert_lines(convert, changed, translate=None):
+    """Convert changed lines with convert(lines) -> results and translate all of them in one call
+    if translate is given. Returns a patch {index: converted line as a dictionary}
+    and a flag whether it was translated"""
+
+    indexes = sorted(changed)
+    lines = [as_dict(result) for result in convert([changed[index] for index in indexes])]
+    translated = False
+
+    if translate and lines:
+        translation = translate('\n'.join(line['text'] for line in lines))
+
+        # Keep English lines if there was no free translator or lines were merged in translation
+        if translation is not None and translation.count('\n') == len(lines) - 1:
+            # Spans point to the English text, the translation has none
+            for line, text in zip(lines, translation.split('\n')):
+                line.update(text=text, html=escape(text), spans=[])
+            translated = True
+
+    return {str(index): line for index, line in zip(indexes, lines)}, translated
@@ -0,0 +1,113 @@
+'''
+This module describes target systems of measurement for ARConverter.
+Every profile is compiled once on import and never changes after that,
+so a converter built for a profile can be shared between all requests
+'''
+
+from collections import namedtuple
+from fractions import Fraction
+from types import MappingProxyType
+
+
+# kind - 'density' converts volume to weight with a coefficient of the item (grams in 1 cup),
+# 'scale' just multiplies amount by the factor.
+# Values not bigger than fine_below are rounded to fine_precision decimal places, the rest to precision
+UnitRule = namedtuple('UnitRule', ['kind', 'factor', 'label', 'precision', 'fine_below', 'fine_precision'])
+UnitRule.__new__.__defaults__ = (0, None, 2)
+
+# Converted temperature is (amount - base)*scale + shift. Amounts bigger than threshold are
+# considered as temperature even without a unit word next to them
+TemperatureRule = namedtuple('TemperatureRule', ['names', 'warning_names', 'threshold', 'base', 'scale', 'shift',
+                                                 'label', 'source_symbol', 'target_symbol', 'target_name'])
+
+ConversionProfile = namedtuple('ConversionProfile', ['name', 'source_title', 'title', 'units', 'aliases', 'rules',
+                                                     'temperature'])
+
+AMERICAN_UNITS = (('cup', 'cups', 'c'), ('oz', 'ounce', 'ounces'), ('lb', 'lbs', 'pound', 'pounds'),
+                  ('grams', 'gr', 'gram', 'g'), ('tsp', 'teaspoon', 'ts'), ('tbsp', 'tablespoon', 'tablespoons', 'tbs'),
+                  ('gallon', 'gallons'), ('pint', 'pints'), ('quart', 'quarts'), ('stick', 'sticks'),
+                  ('ml', 'milliliters', 'milliliter'), ('floz',), ('inch', 'inches', 'in', "''"),
+                  ('cm', 'cantimeters'))
+
+METRIC_UNITS = (('grams', 'gr', 'gram', 'g'), ('kg', 'kilogram', 'kilograms'), ('ml', 'milliliters', 'milliliter'),
+                ('l', 'liter', 'liters', 'litre', 'litres'), ('cm', 'cantimeters', 'centimeters'))
+
+FAHRENHEIT_NAMES = ('f', 'fahrenheit', 'fahrenheits')
+CELSIUS_NAMES = ('c', 'celsius')
+
+# Volume of different tools in ml
+ML_MEASURES = {'tbsp': Fraction(15), 'gallon': Fraction('3875.4'), 'pint': Fraction(473), 'quart': Fraction('946.4'),
+               'cup': Fraction(240), 'stick': Fraction(120), 'floz': Fraction('29.5')}
+
+GRAMS_IN_OZ = Fraction('28.35')
+GRAMS_IN_LB = Fraction('453.6')
+CM_IN_INCH = Fraction('2.54')
+UK_FLOZ_ML = Fraction('28.4131')
+UK_PINT_ML = Fraction('568.261')
+UK_GALLON_ML = Fraction('4546.09')
+
+FAHRENHEIT_TO_CELSIUS = TemperatureRule(names=FAHRENHEIT_NAMES, warning_names=CELSIUS_NAMES, threshold=270,
+                                        base=32, scale=Fraction(5, 9), shift=0, label=' °C.',
+                                        source_symbol='F', target_symbol='C', target_name='Celsius')
+
+CELSIUS_TO_FAHRENHEIT = TemperatureRule(names=CELSIUS_NAMES, warning_names=(), threshold=None,
+                                        base=0, scale=Fraction(9, 5), shift=32, label=' °F.',
+                                        source_symbol='C', target_symbol='F', target_name='Fahrenheit')
+
+
+def compile_profile(name, source_title, title, units, rules, temperature=None):
+    """Build an immutable profile - alias lookup for unit words and read-only rules"""
+
+    aliases = {alias: group[0] for group in units for alias in group}
+
+    return ConversionProfile(name=name, source_title=source_title, title=title, units=tuple(units),
+                             aliases=MappingProxyType(aliases), rules=MappingProxyType(dict(rules)),
+                             temperature=temperature)
+
+
+def volume_density_rules(label='grams', factor=1):
+    """Rules converting every known volume measure to weight through cups"""
+
+    return {measure: UnitRule('density', ml / ML_MEASURES['cup'] * factor, label)
+            for measure, ml in ML_MEASURES.items()}
+
+
+METRIC_GRAMS = compile_profile(
+    'metric_grams', 'Imperial(American)', 'Metric', AMERICAN_UNITS,
+    dict(volume_density_rules(),
+         oz=UnitRule('scale', GRAMS_IN_OZ, 'grams'),
+         lb=UnitRule('scale', GRAMS_IN_LB, 'grams'),
+         inch=UnitRule('scale', CM_IN_INCH, 'cm', 0, 5, 2)),
+    FAHRENHEIT_TO_CELSIUS)
+
+METRIC_ML = compile_profile(
+    'metric_ml', 'Imperial(American)', 'Metric (ml)', AMERICAN_UNITS,
+    dict({measure: UnitRule('scale', ml, 'ml') for measure, ml in ML_MEASURES.items() if measure != 'stick'},
+         tsp=UnitRule('scale', Fraction(5), 'ml'),
+         stick=volume_density_rules()['stick'],
+         oz=UnitRule('scale', GRAMS_IN_OZ, 'grams'),
+         lb=UnitRule('scale', GRAMS_IN_LB, 'grams'),
+         inch=UnitRule('scale', CM_IN_INCH, 'cm', 0, 5, 2)),
+    FAHRENHEIT_TO_CELSIUS)
+
+UK_IMPERIAL = compile_profile(
+    'uk_imperial', 'Imperial(American)', 'Imperial(UK)', AMERICAN_UNITS,
+    dict(cup=UnitRule('scale', ML_MEASURES['cup'] / UK_FLOZ_ML, 'fl oz', 0, 10, 1),
+         floz=UnitRule('scale', ML_MEASURES['floz'] / UK_FLOZ_ML, 'fl oz', 0, 10, 1),
+         pint=UnitRule('scale', ML_MEASURES['pint'] / UK_PINT_ML, 'pints', 2),
+         quart=UnitRule('scale', ML_MEASURES['quart'] / UK_PINT_ML, 'pints', 2),
+         gallon=UnitRule('scale', ML_MEASURES['gallon'] / UK_GALLON_ML, 'gallons', 2)),
+    FAHRENHEIT_TO_CELSIUS)
+
+AMERICAN = compile_profile(
+    'american', 'Metric', 'Imperial(American)', METRIC_UNITS,
+    dict(grams=UnitRule('scale', 1 / GRAMS_IN_OZ, 'oz', 0, 10, 1),
+         kg=UnitRule('scale', 1000 / GRAMS_IN_LB, 'lb', 0, 10, 1),
+         ml=UnitRule('scale', 1 / ML_MEASURES['cup'], 'cups', 2),
+         l=UnitRule('scale', 1000 / ML_MEASURES['cup'], 'cups', 2),
+         cm=UnitRule('scale', 1 / CM_IN_INCH, 'inch', 0, 5, 1)),
+    CELSIUS_TO_FAHRENHEIT)
+
+PROFILES = MappingProxyType({profile.name: profile for profile in [METRIC_GRAMS, METRIC_ML, UK_IMPERIAL, AMERICAN]})
+
+DEFAULT_PROFILE = METRIC_GRAMS.name
@@ -0,0 +1,70 @@
+'''
+This module describes the result of a line conversion.
+Besides the converted text a result keeps its spans - replaced amounts and units
+with their original text, and warnings the converter added to the line.
+Renderers walk the text once and wrap the spans, nothing is parsed again
+'''
+
+from collections import namedtuple
+from html import escape
+
+ConversionResult = namedtuple('ConversionResult', ['source', 'text', 'spans', 'complete'])
+Span = namedtuple('Span', ['start', 'end', 'kind', 'original'])
+
+CONVERSION = 'conversion'
+WARNING = 'warning'
+
+
+def make_result(source, text, edits=(), complete=True):
+    """Result from edits (start, end, kind, original) in the converted text. Edits can go in any order,
+    overlapping conversions are merged into one span"""
+
+    spans = []
+
+    for edit in sorted(edits):
+        span = Span(*edit)
+
+        if span.start == span.end and not span.original:
+            continue
+
+        if spans and span.start < spans[-1].end:
+            previous = spans.pop()
+            span = Span(previous.start, max(previous.end, span.end), previous.kind,
+                        previous.original + span.original)
+
+        spans.append(span)
+
+    return ConversionResult(source, text, spans, complete)
+
+
+def render_html(result):
+    """Converted text as html - replacements are marked with the original text in a title,
+    warnings are highlighted"""
+
+    parts = []
+    position = 0
+
+    for span in result.spans:
+        if span.start == span.end:     # deleted words like 'F' after converted temperature aren't shown
+            continue
+
+        parts.append(escape(result.text[position:span.start]))
+        text = escape(result.text[span.start:span.end])
+
+        if span.kind == WARNING:
+            parts.append('<span class="conversion-warning">{}</span>'.format(text))
+        else:
+            parts.append('<mark class="conversion" title="{}">{}</mark>'.format(escape(span.original), text))
+
+        position = span.end
+
+    parts.append(escape(result.text[position:]))
+
+    return ''.join(parts)
+
+
+def as_dict(result):
+    """Result in a form suitable for json - every endpoint sends converted lines in this form"""
+
+    return {'text': result.text, 'html': render_html(result), 'complete': result.complete,
+            'spans': [span._asdict() for span in result.spans]}
@@ -0,0 +1,186 @@
+'''
+This module exports conversion tables for the browser.
+Unit rules of every profile and grams in 1 cup of every item go to one json bundle,
+so the page converts simple lines like '1 1/2 cups brown sugar' itself and sends
+only the rest to the server. convert_simple is the reference of the javascript runtime -
+both do the same exact arithmetic, and vectors in the bundle are converted by the server
+'''
+
+import hashlib
+import json
+import re
+from collections.abc import Mapping
+from fractions import Fraction
+from functools import lru_cache
+
+from anevolina.modules.converter import get_converter, load_coefficients
+from anevolina.modules.profiles import PROFILES
+
+TABLES_FORMAT = 1
+
+# Amount, unit right after it and words without numbers. Other lines are converted on the server
+SIMPLE_LINE = re.compile(r'(\d+ \d+/\d+|\d+/\d+|\d+(?:[.,]\d+)?) ([A-Za-z]+)((?:[ ,-]+[A-Za-z]+)*[ ,]*)')
+LINK = re.compile(r'https|www|\.com')
+WORD = re.compile(r'[A-Za-z]+')
+
+VECTOR_AMOUNTS = ['1', '1/2', '2 1/4', '0,75', '3.5', '12']
+VECTOR_ITEMS = ['sugar', 'brown sugar', 'flour, sifted', 'butter', 'water', 'cream cheese', 'beans']
+
+
+@lru_cache(maxsize=None)
+def get_tables():
+    """The bundle for the current coefficients, profiles and converter. Built once per process"""
+
+    return export_tables()
+
+
+def export_tables():
+    """{'format', 'version', 'coefficients', 'profiles', 'vectors'}. The version is a hash of the rest,
+    it changes with the tables and with results of the converter for the vectors"""
+
+    tables = {'format': TABLES_FORMAT,
+              'coefficients': plain(load_coefficients()),
+              'profiles': {name: export_profile(profile) for name, profile in PROFILES.items()}}
+    tables['vectors'] = {name: make_vectors(tables, name) for name in PROFILES}
+
+    content = json.dumps(tables, sort_keys=True, separators=(',', ':'))
+    tables['version'] = hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+
+    return tables
+
+
+def plain(value):
+    """Read-only coefficients as plain dictionaries for json"""
+
+    if isinstance(value, Mapping):
+        return {key: plain(item) for key, item in value.items()}
+
+    return value
+
+
+def export_profile(profile):
+    """Unit rules with exact factors as [numerator, denominator]"""
+
+    rules = {}
+
+    for measure, rule in profile.rules.items():
+        factor = Fraction(rule.factor)
+        rules[measure] = {'kind': rule.kind, 'factor': [factor.numerator, factor.denominator], 'label': rule.label,
+                          'precision': rule.precision, 'fine_below': rule.fine_below,
+                          'fine_precision': rule.fine_precision}
+
+    temperature = profile.temperature
+
+    return {'aliases': dict(profile.aliases), 'rules': rules,
+            'temperature_names': list(temperature.names + temperature.warning_names) if temperature else [],
+            'threshold': temperature.threshold if temperature else None}
+
+
+def make_vectors(tables, profile_name):
+    """Simple lines with results of the server converter - [[line, converted line]]"""
+
+    converter = get_converter(profile_name)
+    vectors = []
+
+    for number, measure in enumerate(sorted(tables['profiles'][profile_name]['rules'])):
+        for amount in VECTOR_AMOUNTS:
+            item = VECTOR_ITEMS[(number + len(vectors)) % len(VECTOR_ITEMS)]
+            line = '{} {} {}'.format(amount, measure, item)
+            vectors.append([line, converter.process_line(line, 0)])
+
+    return vectors
+
+
+def convert_simple(tables, profile_name, line):
+    """Convert a simple line with the tables the same way as the server converter does.
+    None if the line isn't simple - it has to be converted on the server"""
+
+    match = SIMPLE_LINE.fullmatch(line)
+    profile = tables['profiles'].get(profile_name)
+
+    if not match or not profile or LINK.search(line):
+        return None
+
+    amount = parse_simple_amount(match.group(1))
+    unit = match.group(2)
+    measure = profile['aliases'].get(unit.lower())
+
+    if amount is None or not measure or unit.lower() in profile['temperature_names']:
+        return None
+    if profile['threshold'] is not None and amount > profile['threshold']:
+        return None
+
+    rule = profile['rules'].get(measure)
+
+    if rule is None:
+        new_amount, label = format_simple_amount(amount), measure
+    elif rule['kind'] == 'density':
+        words = WORD.findall(line)
+        coefficient = find_coefficient(tables['coefficients'], words)
+        if coefficient is None:
+            return line
+        new_amount, label = round_simple_amount(coefficient * amount * Fraction(*rule['factor']), rule), rule['label']
+    else:
+        new_amount, label = round_simple_amount(amount * Fraction(*rule['factor']), rule), rule['label']
+
+    if new_amount is None:
+        return None
+
+    return '{} {}{}'.format(new_amount, label, match.group(3))
+
+
+def parse_simple_amount(amount):
+    """'2', '2.5', '2,5', '1/2' or '2 1/2' as a Fraction, None for a zero denominator"""
+
+    whole, _, fraction = amount.rpartition(' ') if '/' in amount else ('', '', amount)
+
+    if '/' in fraction:
+        numerator, denominator = fraction.split('/')
+        if int(denominator) == 0:
+            return None
+        return int(whole or 0) + Fraction(int(numerator), int(denominator))
+
+    return Fraction(fraction.replace(',', '.'))
+
+
+def find_coefficient(coefficients, words):
+    """Grams in 1 cup of the last known item. The first word which is a specification of the item
+    chooses its coefficient"""
+
+    items = [word.lower() for word in words if word.lower() in coefficients]
+
+    if not items:
+        return None
+
+    coefficient = coefficients[items[-1]]
+
+    if isinstance(coefficient, dict):
+        specs = [coefficient[word] for word in words if coefficient.get(word)]
+        return specs[0] if specs else coefficient['']
+
+    return coefficient
+
+
+def round_simple_amount(value, rule):
+    """Round like round_amount of the converter - half to even, precise rules give floats"""
+
+    if rule['fine_below'] is not None and value <= rule['fine_below']:
+        precision = rule['fine_precision']
+    elif rule['precision']:
+        precision = rule['precision']
+    else:
+        return str(round(value))
+
+    return str(float(round(value, precision)))
+
+
+def format_simple_amount(value):
+    """Amount as format_amount writes it. None when a float would round a tie - it depends on binary digits"""
+
+    if value.denominator == 1:
+        return str(value.numerator)
+
+    if (value * 200).denominator == 1 and (value * 100).denominator != 1:
+        return None
+
+    return str(round(float(value), 2))
@@ -0,0 +1,46 @@
+'''
+This module translates converted recipes.
+googletrans and its http stack are imported only when
+a translation is actually requested.
+With TRANSLATION_SERVICE_URL set, text goes to that service instead of Google -
+e.g. to the stub used by the loadtest command
+'''
+
+from functools import lru_cache
+from importlib import import_module
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from django.conf import settings
+
+SERVICE_URLS = ['translate.google.com', 'translate.google.co.kr']
+
+
+@lru_cache(maxsize=None)
+def get_translator():
+    """Import googletrans and create a translator on the first call, reuse it afterwards"""
+
+    googletrans = import_module('googletrans')
+
+    return googletrans.Translator(service_urls=SERVICE_URLS)
+
+
+def translate(text, dest='ru'):
+    """Translate text to the dest language and return translated text"""
+
+    service_url = getattr(settings, 'TRANSLATION_SERVICE_URL', None)
+    if service_url:
+        return translate_with_service(service_url, text, dest)
+
+    translation = get_translator().translate(text, dest=dest)
+
+    return translation.text
+
+
+def translate_with_service(url, text, dest):
+    """POST text and dest as form fields, the service answers with translated plain text"""
+
+    data = urlencode({'text': text, 'dest': dest}).encode('utf-8')
+
+    with urlopen(url, data=data, timeout=settings.TRANSLATION_TIMEOUT) as response:
+        return response.read().decode('utf-8')
@@ -0,0 +1,48 @@
+'''
+This module compares the converter with the legacy reference in production.
+A sample of conversions is checked in a background thread, so requests never wait for it,
+and every line converted differently is logged. Numbers may differ within CONVERTER_SHADOW_TOLERANCE,
+lines which weren't converted in their budget aren't compared
+'''
+
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from anevolina.modules.differential import convert, legacy_converter, same_results
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(max_workers=1)
+pending = threading.BoundedSemaphore(settings.CONVERTER_SHADOW_QUEUE)
+
+
+def shadow_compare(lines, results):
+    """Send a sample of conversions (ConversionResult for every line) to the background comparison. Samples are dropped
+    when the queue is full. Returns True if the conversion was sent"""
+
+    if random.random()*100 >= settings.CONVERTER_SHADOW_PERCENT:
+        return False
+
+    if not pending.acquire(blocking=False):
+        return False
+
+    future = executor.submit(compare, list(lines), list(results))
+    future.add_done_callback(lambda _: pending.release())
+
+    return True
+
+
+def compare(lines, results):
+    reference = legacy_converter()
+
+    for line, result in zip(lines, results):
+        if not result.complete:
+            continue
+
+        expected = convert(reference, line)
+        if not same_results(expected, result.text, settings.CONVERTER_SHADOW_TOLERANCE):
+            logger.warning('Converter divergence for %r: legacy %r, current %r', line, expected, result.text)
@@ -0,0 +1,53 @@
+'''
+This module stores static files for production.
+collectstatic writes files with a hash of their content in the name
+and next to every text file its gzip and brotli versions, so nothing
+is compressed while serving
+'''
+
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, only gzip versions are written without it
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.map', '.ico', '.xml')
+
+# Don't keep compressed versions which save less than 5%
+MIN_RATIO = 0.95
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        """Hash file names as usual, then write .gz and .br versions of hashed text files"""
+
+        yield from super().post_process(paths, dry_run, **options)
+
+        if dry_run:
+            return
+
+        for hashed_name in set(self.hashed_files.values()):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        path = self.path(name)
+
+        with open(path, 'rb') as file:
+            content = file.read()
+
+        variants = [('.gz', gzip.compress(content, compresslevel=9))]
+        if brotli:
+            variants.append(('.br', brotli.compress(content)))
+
+        for extension, compressed in variants:
+            if len(compressed) < len(content)*MIN_RATIO:
+                with open(path + extension, 'wb') as file:
+                    file.write(compressed)
+            elif os.path.exists(path + extension):
+                os.remove(path + extension)
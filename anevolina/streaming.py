@@ -0,0 +1,104 @@
+'''
+This module streams conversion results.
+Lines are converted in small batches and every batch is sent as soon as it's ready,
+compressed on the fly with brotli or gzip - whichever the browser accepts.
+Every batch is flushed from the compressor, so the browser can show it right away
+'''
+
+import json
+import zlib
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from anevolina import conversions
+from anevolina.middleware import accepted_encodings
+from anevolina.modules.converter import clock
+from anevolina.modules.results import as_dict
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is used without it
+    brotli = None
+
+NDJSON = 'application/x-ndjson'
+TEXT = 'text/plain'
+
+
+def choose_encoding(header):
+    """The best encoding from the Accept-Encoding header we can produce, None for identity"""
+
+    accepted = accepted_encodings(header)
+
+    if brotli and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+
+    return None
+
+
+def compress_stream(chunks, encoding):
+    """Compress byte chunks one by one, flushing after each of them"""
+
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=settings.CONVERTER_STREAM_BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+
+    elif encoding == 'gzip':
+        compressor = zlib.compressobj(settings.CONVERTER_STREAM_GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+    else:
+        yield from chunks
+
+
+def convert_batches(profile_name, lines, budget=None, line_budget=None, batch=None):
+    """Results of lines in batches. The budget is for all lines - when it's spent,
+    the rest of the lines are marked as not converted"""
+
+    batch = batch or settings.CONVERTER_STREAM_BATCH
+    deadline = clock() + budget if budget else None
+
+    for start in range(0, len(lines), batch):
+        # A tiny positive budget instead of 0 which means no limit
+        left = max(deadline - clock(), 1e-9) if deadline is not None else None
+        yield conversions.convert_lines(profile_name, lines[start:start + batch], left, line_budget)
+
+
+def render_batches(batches, content_type):
+    """Encoded chunks - a json object per line for NDJSON, converted lines for text"""
+
+    index = 0
+
+    for results in batches:
+        if content_type == NDJSON:
+            records = [json.dumps(dict(as_dict(result), index=index + number)) for number, result in enumerate(results)]
+        else:
+            records = [result.text for result in results]
+
+        index += len(results)
+        yield ''.join(record + '\n' for record in records).encode('utf-8')
+
+
+def streaming_conversion(request, profile_name, lines, content_type=NDJSON):
+    """Streaming response with converted lines, compressed if the browser accepts it"""
+
+    batches = convert_batches(profile_name, lines, settings.CONVERTER_REQUEST_BUDGET, settings.CONVERTER_LINE_BUDGET)
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+    response = StreamingHttpResponse(compress_stream(render_batches(batches, content_type), encoding),
+                                     content_type='{}; charset=utf-8'.format(content_type))
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = 'no-store'
+    # Proxies like nginx shouldn't buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+
+    return response
@@ -1,3 +1,825 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from anevolina import conversions, images, shadow, storage, streaming, throttling
+from anevolina.cards import card_key
+from anevolina.forms import ConverterForm
+from anevolina.logs import DirectoryFileHandler
+from anevolina.middleware import IMMUTABLE, REVALIDATE, PrecompressedStaticMiddleware
+from anevolina.models import Project
+from anevolina.modules import concurrency, corpus, differential, tables
+from anevolina.modules.amounts import find_amount_tokens, parse_amount
+from anevolina.modules.converter import UNCONVERTED_MARKER, ARConverter, get_converter, load_coefficients, read_only
+from anevolina.modules.converter import logger as converter_logger
+from anevolina.modules.glossary import translate_known_lines
+from anevolina.modules.incremental import line_hash
+from anevolina.modules.profiles import PROFILES
+from anevolina.modules.results import Span, as_dict, render_html
+from portfolio.sqlite3.base import PRAGMAS
+
+
+class ImportTimeTest(SimpleTestCase):
+    """Run `python -X importtime` for anevolina.views in a clean interpreter"""
+
+    budget_us = 250000
+    heavy_modules = ['googletrans', 'demoji', 'httpx', 'requests', 'PIL']
+
+    def import_times(self):
+        code = 'import django; django.setup(); import anevolina.views'
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='portfolio.settings', DJANGO_SECRET_KEY='import-time')
+
+        output = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=settings.BASE_DIR, env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+        result = {}
+        for line in output.stderr.splitlines():
+            if not line.startswith('import time:') or '|' not in line:
+                continue
+            _, cumulative, module = line.split('|')
+            if cumulative.strip().isdigit():
+                result[module.strip()] = int(cumulative)
+
+        return result
+
+    def test_views_import_within_budget(self):
+        times = self.import_times()
+
+        self.assertIn('anevolina.views', times)
+        self.assertLess(times['anevolina.views'], self.budget_us)
+
+    def test_views_import_skips_heavy_dependencies(self):
+        times = self.import_times()
+
+        for module in self.heavy_modules:
+            self.assertNotIn(module, times)
+
+
+class LogDirectoryTest(SimpleTestCase):
+
+    def test_directory_is_created_with_the_first_message(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'log', 'converter_log.log')
+
+        handler = DirectoryFileHandler(path, delay=True)
+        self.addCleanup(handler.close)
+        self.assertFalse(os.path.exists(os.path.dirname(path)))
+
+        handler.emit(logging.makeLogRecord({'msg': 'INVALID PRODUCT: 1 cup stardust'}))
+
+        with open(path) as file:
+            self.assertIn('stardust', file.read())
+
+    def test_settings_import_creates_no_directories(self):
+        script = ('import os, django; made = []; '
+                  'os.makedirs = lambda *args, **kwargs: made.append(args); '
+                  'django.setup(); print(made)')
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='portfolio.settings', DJANGO_SECRET_KEY='import-time')
+
+        result = subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True, check=True)
+
+        self.assertEqual(result.stdout.strip(), '[]')
+
+
+@override_settings(CONVERTER_MAX_LINES=3)
+class AdmissionControlTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_window_allows_burst_then_rejects(self):
+        results = [throttling.take_token('test-requests', rate=0.001, burst=3) for _ in range(4)]
+
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_simultaneous_requests_are_all_counted(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: throttling.take_token('test-requests', rate=0.001, burst=5), range(40)))
+
+        self.assertEqual(sum(results), 5)
+
+    def test_client_address_behind_proxy(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2')
+
+        self.assertEqual(throttling.client_ip(request), '10.0.0.1')
+        with override_settings(CONVERTER_TRUSTED_PROXIES=1):
+            self.assertEqual(throttling.client_ip(request), '2.2.2.2')
+            self.assertEqual(throttling.client_ip(RequestFactory().get('/', REMOTE_ADDR='10.0.0.1')), '10.0.0.1')
+        with override_settings(CONVERTER_TRUSTED_PROXIES=2):
+            self.assertEqual(throttling.client_ip(request), '1.1.1.1')
+
+    def test_form_rejects_too_many_lines(self):
+        self.assertTrue(ConverterForm({'recipe': '1 cup\n2 cups\n3 cups'}).is_valid())
+        self.assertFalse(ConverterForm({'recipe': '1 cup\n2 cups\n3 cups\n4 cups'}).is_valid())
+
+    @override_settings(CONVERTER_TRANSLATION_CONCURRENCY=2)
+    def test_translation_slots_are_counted_in_cache(self):
+        self.assertEqual([throttling.take_translation_slot() for _ in range(3)], [True, True, False])
+
+        throttling.release_translation_slot()
+
+        self.assertTrue(throttling.take_translation_slot())
+        self.assertEqual(cache.get(throttling.TRANSLATION_SLOTS_KEY), 2)
+
+    def test_translation_is_skipped_when_slots_are_busy(self):
+        cache.set(throttling.TRANSLATION_SLOTS_KEY, settings.CONVERTER_TRANSLATION_CONCURRENCY)
+
+        with mock.patch.object(throttling, 'translate') as translate:
+            self.assertIsNone(throttling.translate_if_free('1 cup of something special'))
+            self.assertEqual(throttling.translate_if_free('1 cup sugar'), '1 стакан сахара')
+
+        translate.assert_not_called()
+
+
+class GlossaryTest(SimpleTestCase):
+
+    def test_known_lines_are_translated_locally(self):
+        lines = ['288 grams all-purpose flour', 'Preheat oven to 191 °C.', '2 large eggs', 'Chill overnight']
+
+        self.assertEqual(translate_known_lines(lines, 'ru'), ['288 г пшеничной муки', 'Разогрейте духовку до 191 °C.',
+                                                              '2 крупных яйца', None])
+
+    def test_nouns_agree_with_numbers(self):
+        lines = ['1 cup sugar', '21 cups sugar', '3 cups flour', '6 cups flour', '12 cups flour', '5 eggs',
+                 '5 large eggs', '1 1/2 cups milk', 'Bake for 25-30 minutes', '14 lbs butter', 'Beat the eggs']
+
+        self.assertEqual(translate_known_lines(lines, 'ru'), [
+            '1 стакан сахара', '21 стакан сахара', '3 стакана муки', '6 стаканов муки', '12 стаканов муки', '5 яиц',
+            '5 крупных яиц', '1 1/2 стакана молока', 'Выпекайте 25-30 минут', '14 фунтов сливочного масла', None])
+
+    def test_words_out_of_their_place_are_sent(self):
+        lines = ['Mix flour and sugar', 'Cream butter and sugar', 'Sugar', '9x13 pan', 'Fold in chocolate chips',
+                 'Topping sugar']
+
+        self.assertEqual(translate_known_lines(lines, 'ru'), [None] * len(lines))
+
+    def test_units_and_ingredients_in_their_place_are_translated(self):
+        lines = ['Add 1 cup sugar or honey', '1/2 cup butter, melted', 'Topping', 'Mix in a large bowl',
+                 'Measures might be in inches: 9x13 in. = 23x33 cm']
+
+        self.assertEqual(translate_known_lines(lines, 'ru'), [
+            'Добавьте 1 стакан сахара или меда', '1/2 стакана сливочного масла, растопленного', 'Посыпка',
+            'Перемешайте в большой миске', 'Размеры могут быть в дюймах: 9x13 дюйм. = 23x33 см'])
+
+    def test_only_unknown_lines_are_sent(self):
+        text = '120 grams sugar\n\nChill overnight\nMix well.'
+
+        with mock.patch.object(throttling, 'translate', return_value='Охладите за ночь') as translate:
+            translation = throttling.translate_if_free(text, dest='ru')
+
+        translate.assert_called_once_with('Chill overnight', dest='ru')
+        self.assertEqual(translation, '120 г сахара\n\nОхладите за ночь\nХорошо перемешайте.')
+
+    def test_known_text_does_not_touch_translator(self):
+        with mock.patch.object(throttling, 'translate') as translate:
+            translation = throttling.translate_if_free('1 tsp baking soda\n151 grams granulated sugar', dest='ru')
+
+        translate.assert_not_called()
+        self.assertEqual(translation, '1 ч. л. пищевой соды\n151 г сахарного песка')
+
+
+class ConvertLinesTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, data):
+        return self.client.post(reverse('convert_lines'), json.dumps(data), content_type='application/json')
+
+    def test_line_hash_is_fnv1a(self):
+        self.assertEqual(line_hash(''), '811c9dc5')
+        self.assertEqual(line_hash('a'), 'e40c292c')
+
+    def test_only_changed_lines_are_converted(self):
+        lines = ['1 cup sugar', 'mix well', '2 oz butter']
+        data = {'hashes': [line_hash(line) for line in lines], 'lines': {'2': lines[2]}, 'to_translate': 'EN'}
+
+        response = self.post(data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'count': 3, 'translated': False, 'patch': {'2': {
+            'text': '57 grams butter', 'complete': True,
+            'html': '<mark class="conversion" title="2">57</mark> <mark class="conversion" title="oz">grams</mark> butter',
+            'spans': [{'start': 0, 'end': 2, 'kind': 'conversion', 'original': '2'},
+                      {'start': 3, 'end': 8, 'kind': 'conversion', 'original': 'oz'}]}}})
+
+    def test_translated_lines_have_no_spans(self):
+        data = {'hashes': [line_hash('2 oz butter')], 'lines': {'0': '2 oz butter'}, 'to_translate': 'RU'}
+
+        with mock.patch('anevolina.views.translate_if_free', return_value='57 г <масла>'):
+            response = self.post(data)
+
+        self.assertEqual(response.json()['patch'], {'0': {'text': '57 г <масла>', 'html': '57 г &lt;масла&gt;',
+                                                          'complete': True, 'spans': []}})
+        self.assertTrue(response.json()['translated'])
+
+    def test_line_with_wrong_hash_is_rejected(self):
+        response = self.post({'hashes': [line_hash('1 cup sugar')], 'lines': {'0': '2 cups sugar'}})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class ProfilesTest(SimpleTestCase):
+    expected = {
+        'metric_grams': {'1 1/2 cups flour': '192 grams flour', '8 oz butter': '227 grams butter',
+                         '9x13 inch pan': '23x33 cm pan', '350 F': '177 °C. ', '180 C': '180 C'},
+        'metric_ml': {'1 c milk': '240 ml milk', '2 tbsp honey': '30 ml honey', '1 tsp salt': '5 ml salt',
+                      '8 oz butter': '227 grams butter', 'Preheat oven to 180 C': 'Preheat oven to 180 C',
+                      '2 c': '2 c'},
+        'uk_imperial': {'1 c milk': '8.4 fl oz milk', '1 1/2 cups flour': '13 fl oz flour',
+                        '1 pint cream': '0.83 pints cream', '8 oz butter': '8 oz butter',
+                        'Preheat oven to 180 C': 'Preheat oven to 180 C'},
+        'american': {'200 g chocolate': '7.1 oz chocolate', '500 ml milk': '2.08 cups milk',
+                     '2 kg flour': '4.4 lb flour', '20 cm pan': '8 inch pan', '180 C': '356 °F. ',
+                     '1 1/2 cups flour': '1 1/2 cups flour'},
+    }
+
+    def test_profiles_convert_to_their_units(self):
+        for name, lines in self.expected.items():
+            converter = get_converter(name)
+            for line, expected in lines.items():
+                self.assertEqual(converter.process_line(line), expected, '{}: {}'.format(name, line))
+
+
+class ConversionResultTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_spans_keep_original_text(self):
+        result = get_converter().convert('1 cup sugar')
+
+        self.assertEqual(result.text, '201 grams sugar')
+        self.assertEqual(result.spans, [Span(0, 3, 'conversion', '1'), Span(4, 9, 'conversion', 'cup')])
+
+    def test_html_is_escaped_and_highlighted(self):
+        html = render_html(get_converter().convert('<b>2 oz</b> butter'))
+
+        self.assertEqual(html, '&lt;b&gt;<mark class="conversion" title="2">57</mark> '
+                               '<mark class="conversion" title="oz">grams</mark>&lt;/b&gt; butter')
+
+    def test_warnings_are_spans(self):
+        result = get_converter().convert('400 C oven')
+
+        self.assertEqual([span.kind for span in result.spans], ['warning'])
+        self.assertTrue(result.text[result.spans[0].start:].startswith('(Possible mistake!'))
+
+    def test_results_are_shared_through_cache(self):
+        conversions.convert_lines('metric_grams', ['1 cup sugar'])
+
+        with mock.patch.object(ARConverter, 'convert_many', return_value=[]) as convert_many:
+            results = conversions.convert_lines('metric_grams', ['1 cup sugar', '1 cup sugar'])
+
+        self.assertEqual([result.text for result in results], ['201 grams sugar'] * 2)
+        convert_many.assert_called_once_with([], None, None)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class ProjectCardTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.project = Project.objects.create(title='Converter', description='Cups to grams', source_url='-',
+                                              image='/img/converter.png')
+
+    def test_card_is_rendered_on_save(self):
+        self.assertIn('converter', cache.get(card_key(self.project)))
+
+        self.project.title = 'New Converter'
+        self.project.save()
+
+        self.assertIn('new converter', cache.get(card_key(self.project)))
+
+    def test_saved_project_stays_saved_if_card_fails(self):
+        with mock.patch('anevolina.cards.render_to_string', side_effect=ValueError('broken template')):
+            self.project.title = 'Broken card'
+            self.project.save()
+
+        self.assertEqual(Project.objects.get(pk=self.project.pk).title, 'Broken card')
+
+    def test_index_shows_stored_cards(self):
+        cache.set(card_key(self.project), '<div>stored card</div>')
+
+        response = self.client.get(reverse('index'))
+
+        self.assertContains(response, '<div>stored card</div>', html=True)
+
+
+class SQLiteBackendTest(SimpleTestCase):
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = dict(settings.DATABASES['default'], NAME=os.path.join(directory.name, 'db.sqlite3'))
+        connection = ConnectionHandler({'default': database})['default']
+        self.addCleanup(connection.close)
+
+        with connection.cursor() as cursor:
+            pragmas = {name: cursor.execute('PRAGMA {}'.format(name)).fetchone()[0] for name, value in PRAGMAS}
+
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'mmap_size': 256 * 1024 * 1024,
+                                   'cache_size': -20000, 'temp_store': 2})
+
+
+class DifferentialTest(SimpleTestCase):
+
+    def test_minimize_keeps_only_diverging_part(self):
+        minimized = differential.minimize('mix 2 cups of sugar and bake', lambda line: 'sugar' in line)
+
+        self.assertEqual(minimized, 'sugar')
+
+    def test_engines_agree_on_whole_amounts(self):
+        lines = ['2 cups sugar', '350 F', '2-3 oz butter', '9x13 pan', '4 to 5 cups flour', 'bake 400 C',
+                 '350 fahrenheit 1/2 hour']
+
+        self.assertEqual(list(differential.compare_lines(lines)), [])
+
+    def test_rounding_differences_are_tolerated(self):
+        self.assertFalse(differential.same_results('112 grams honey', '113 grams honey'))
+        self.assertTrue(differential.same_results('112 grams honey', '113 grams honey', tolerance=0.05))
+        self.assertFalse(differential.same_results('112 grams honey', '113 grams milk', tolerance=0.05))
+
+
+class ShadowTest(SimpleTestCase):
+
+    def compare(self, lines):
+        results = [get_converter().convert(line) for line in lines]
+
+        with mock.patch.object(shadow.logger, 'warning') as warning:
+            shadow.compare(lines, results)
+
+        return [call[0][1] for call in warning.call_args_list]
+
+    def test_divergences_are_logged(self):
+        self.assertEqual(self.compare(['2 cups sugar', '1 cup 2 tbsp sugar']), ['1 cup 2 tbsp sugar'])
+
+    def test_rounding_differences_are_tolerated(self):
+        with mock.patch.object(shadow, 'convert', return_value='403 grams sugar'):
+            self.assertEqual(self.compare(['2 cups sugar']), [])
+
+    def test_unconverted_lines_are_skipped(self):
+        with mock.patch.object(shadow, 'convert') as convert:
+            shadow.compare(['1 cup sugar'], [get_converter().unconverted('1 cup sugar')])
+
+        convert.assert_not_called()
+
+
+class AmountsTest(SimpleTestCase):
+
+    def test_amounts_are_parsed_exactly(self):
+        amounts = {'2': 2, '1 3/4': Fraction(7, 4), '3/8': Fraction(3, 8), '2,5': Fraction(5, 2), '0.75': Fraction(3, 4),
+                   '1 16': 16, '1/0': 0, '1½': Fraction(3, 2), '1 ½': Fraction(3, 2), '⅜': Fraction(3, 8)}
+
+        for token, value in amounts.items():
+            self.assertEqual(parse_amount(token), value, token)
+
+    def test_vulgar_fractions_are_converted(self):
+        converter = get_converter()
+
+        self.assertEqual(converter.process_line('⅜ cup sugar'), '75 grams sugar')
+        self.assertEqual(converter.process_line('1⅝ cups flour'), '208 grams flour')
+        self.assertEqual(converter.process_line('1⅝ cups flour'), converter.process_line('1 5/8 cups flour'))
+
+
+class WorstCaseTest(SimpleTestCase):
+    ADVERSARIAL_LINES = {
+        'long number': '1' * 20000,
+        'many numbers': ' '.join(str(number) for number in range(3000)),
+        'many ranges': ' '.join('{}-{} cups'.format(number, number + 1) for number in range(2000)),
+        'many sizes': ' '.join('{0}x{0}x{0}'.format(number) for number in range(2000)),
+        'long gap': '1' + ' ' * 20000 + '1/2',
+        'spaced dashes before unit': '1 ' + '- ' * 9990 + 'cup',
+        'long gap after unit': '1 cup' + ' ' * 19990 + 'sugar',
+    }
+
+    def test_amounts_are_found_like_the_legacy_regexp(self):
+        template = re.compile(r'\d+[.,]\d+|\d*[ ]*\d+[/]\d+|\d+')
+        lines = ['1 1/2 cups', '2,5-3.5 oz', '1  3/4 to 2/3', '1/ 2 12/ 5 /4', '9x13x2', '4/3/2 1.2.3']
+
+        for line in lines:
+            expected = [amount.strip() for amount in template.findall(line)]
+            self.assertEqual([amount for amount, start, end in find_amount_tokens(line)], expected, line)
+
+    def test_adversarial_lines_are_bounded(self):
+        converter = get_converter()
+        converter.process_line('1 cup sugar')
+
+        for name, line in self.ADVERSARIAL_LINES.items():
+            started = time.perf_counter()
+            converter.process_line(line)
+            self.assertLess(time.perf_counter() - started, 1, name)
+
+    def test_unit_positions_are_found_in_linear_time(self):
+        converter = get_converter()
+        converter.process_line('1 cup sugar')
+
+        for name in ['spaced dashes before unit', 'long gap after unit']:
+            started = time.perf_counter()
+            result = converter.convert(self.ADVERSARIAL_LINES[name])
+            self.assertLess(time.perf_counter() - started, 0.25, name)
+            self.assertTrue(result.complete, name)
+
+    def test_units_inside_words_are_not_replaced(self):
+        self.assertEqual(get_converter().process_line('chocolate 1 c'), 'chocolate 150 grams')
+
+    def test_line_over_budget_is_marked(self):
+        line = self.ADVERSARIAL_LINES['many ranges']
+
+        self.assertEqual(get_converter().process_line(line, budget=0.001), line + UNCONVERTED_MARKER)
+
+    def test_regexp_symbols_are_not_patterns(self):
+        self.assertEqual(get_converter().process_line('1+2 cups (sugar) [3* ^4$ ?'), '1+402 grams (sugar) [3* ^4$ ?')
+
+    def test_lines_after_request_budget_are_marked(self):
+        lines = ['1 cup sugar', '', '2 oz butter']
+
+        self.assertEqual(get_converter().process_lines(lines, budget=-1),
+                         [lines[0] + UNCONVERTED_MARKER, '', lines[2] + UNCONVERTED_MARKER])
+
+
+class ConversionTablesTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_simple_lines_are_converted_like_on_server(self):
+        bundle = tables.get_tables()
+        lines = ['1 1/2 cups brown sugar', '2,5 oz butter, softened', '3/4 cup Sugar icing', '1 cup beans',
+                 '10 inch pan', '1/8 g salt', '500 ml milk', '2 l water']
+
+        for name in PROFILES:
+            converter = get_converter(name)
+            for line, expected in bundle['vectors'][name]:
+                self.assertEqual(tables.convert_simple(bundle, name, line), expected, line)
+            for line in lines:
+                converted = tables.convert_simple(bundle, name, line)
+                self.assertIn(converted, [None, converter.process_line(line)], line)
+
+    def test_ambiguous_lines_are_left_to_server(self):
+        bundle = tables.get_tables()
+
+        for line in ['2-3 cups sugar', '350 F', '1 cup sugar and 2 eggs', '9x13 pan', 'sugar 1 cup', '400 cups']:
+            self.assertIsNone(tables.convert_simple(bundle, 'metric_grams', line), line)
+
+    def test_tables_url_has_version(self):
+        version = tables.get_tables()['version']
+
+        response = self.client.get(reverse('conversion_tables', args=[version]))
+        self.assertEqual(response.json()['version'], version)
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.client.get(reverse('conversion_tables', args=['old']))
+        self.assertRedirects(response, reverse('conversion_tables', args=[version]), fetch_redirect_response=False)
+
+    def test_client_results_are_checked(self):
+        version = tables.get_tables()['version']
+        results = {'metric_grams': [['1 cup sugar', '201 grams sugar'], ['1 cup flour', '130 grams flour'],
+                                    ['2-3 cups sugar', None]]}
+
+        response = self.client.post(reverse('check_conversion_tables'),
+                                    json.dumps({'version': version, 'results': results}),
+                                    content_type='application/json')
+
+        self.assertEqual(response.json()['checked'], 2)
+        self.assertTrue(response.json()['current'])
+        self.assertEqual(response.json()['mismatches'], [{'profile': 'metric_grams', 'line': '1 cup flour',
+                                                          'client': '130 grams flour', 'server': '128 grams flour'}])
+
+    def test_lines_over_the_budget_are_not_checked(self):
+        results = {'metric_grams': [['1 cup flour', '130 grams flour']]}
+
+        with override_settings(CONVERTER_REQUEST_BUDGET=1e-9):
+            response = self.client.post(reverse('check_conversion_tables'), json.dumps({'results': results}),
+                                        content_type='application/json')
+
+        self.assertEqual((response.json()['checked'], response.json()['mismatches']), (0, []))
+
+
+class CorpusTest(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = os.path.join(directory.name, 'recipes')
+        self.output = os.path.join(directory.name, 'converted')
+
+        recipes = {'cookies.txt': '1 cup sugar\n2 cups flour', 'cake/butter.txt': '1 cup butter', 'oven.txt': '350 F'}
+        for path, text in recipes.items():
+            self.write(path, text)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(os.path.join(self.source, path)), exist_ok=True)
+        with open(os.path.join(self.source, path), 'w') as file:
+            file.write(text)
+
+    def reconvert(self, converter=None, **options):
+        return corpus.reconvert(converter or ARConverter(), self.source, self.output, 1, **options)
+
+    def test_only_changed_recipes_are_converted(self):
+        self.assertEqual(len(self.reconvert().converted), 3)
+        self.write('oven.txt', '180 C')
+
+        report = self.reconvert()
+
+        self.assertEqual((report.converted, len(report.skipped)), (['oven.txt'], 2))
+        with open(os.path.join(self.output, 'cookies.txt')) as file:
+            self.assertEqual(file.read(), '201 grams sugar\n256 grams flour')
+
+    def test_coefficient_change_affects_only_its_recipes(self):
+        self.reconvert()
+        converter = ARConverter()
+        converter.coefficients = read_only(dict(load_coefficients(), butter={'': 250}))
+
+        self.assertEqual(self.reconvert(converter).converted, ['cake/butter.txt'])
+
+    def test_outputs_are_kept_if_no_recipes_are_found(self):
+        self.reconvert()
+        shutil.rmtree(self.source)
+        os.makedirs(self.source)
+
+        self.assertEqual(self.reconvert().removed, [])
+        self.assertTrue(os.path.isfile(os.path.join(self.output, 'cookies.txt')))
+        self.assertEqual(len(self.reconvert(force=True).removed), 3)
+
+    def test_command_converts_without_line_budget(self):
+        with mock.patch('anevolina.management.commands.reconvert_corpus.reconvert', wraps=corpus.reconvert) as run:
+            call_command('reconvert_corpus', self.source, self.output, stdout=io.StringIO())
+
+        self.assertEqual(run.call_args[0][0].line_budget, 0)
+        with open(os.path.join(self.output, 'cookies.txt')) as file:
+            self.assertEqual(file.read(), '201 grams sugar\n256 grams flour')
+
+    def test_command_rejects_missing_source(self):
+        with self.assertRaises(CommandError):
+            call_command('reconvert_corpus', self.source + '-typo', self.output)
+
+    def test_interrupted_run_continues(self):
+        def interrupt(path, action):
+            if path == 'cookies.txt':
+                raise KeyboardInterrupt()
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.reconvert(progress=interrupt, checkpoint=100)
+
+        report = self.reconvert()
+
+        self.assertEqual((report.skipped, report.converted), (['cake/butter.txt', 'cookies.txt'], ['oven.txt']))
+
+
+@override_settings(CONVERTER_STREAM_BATCH=2)
+class StreamingTest(SimpleTestCase):
+    recipe = '1 cup sugar\n2 oz butter\n\n350 F\n1 <b>cup</b> flour'
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, encoding='', **data):
+        return self.client.post(reverse('convert_stream'), dict({'recipe': self.recipe}, **data),
+                                HTTP_ACCEPT_ENCODING=encoding)
+
+    def test_lines_are_streamed_as_json(self):
+        response = self.post()
+
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode('utf-8').splitlines()]
+        self.assertEqual([record['text'] for record in records],
+                         ['201 grams sugar', '57 grams butter', '', '177 °C. ', '1 <b>cup</b> flour'])
+        self.assertEqual(records[0]['html'], '<mark class="conversion" title="1">201</mark> '
+                                             '<mark class="conversion" title="cup">grams</mark> sugar')
+        self.assertEqual(records[4]['html'], '1 &lt;b&gt;cup&lt;/b&gt; flour')
+        self.assertEqual(records[1], dict(as_dict(get_converter().convert('2 oz butter')), index=1))
+
+    def test_gzip_chunks_can_be_read_one_by_one(self):
+        response = self.post('gzip, deflate', format='text')
+        decompressor = zlib.decompressobj(31)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        chunks = [decompressor.decompress(chunk) for chunk in response.streaming_content]
+        self.assertEqual(chunks[:3], [b'201 grams sugar\n57 grams butter\n', '\n177 °C. \n'.encode('utf-8'),
+                                      b'1 <b>cup</b> flour\n'])
+
+    @skipUnless(streaming.brotli, 'brotli is not installed')
+    def test_brotli_is_preferred(self):
+        response = self.post('gzip, br', format='text')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        text = streaming.brotli.decompress(b''.join(response.streaming_content)).decode('utf-8')
+        self.assertEqual(text.splitlines()[0], '201 grams sugar')
+        self.assertEqual(self.post('br;q=0, gzip')['Content-Encoding'], 'gzip')
+
+
+class ConcurrencyTest(SimpleTestCase):
+
+    def test_shared_converter_gives_the_same_results_in_threads(self):
+        lines = list(differential.generate_lines(150, seed=1)) + ['9x13 pan', '350 F', '2-3 oz butter']
+
+        for name in PROFILES:
+            runs = list(concurrency.measure_scaling(get_converter(name), lines, [1, 8]))
+
+            self.assertEqual([run.mismatches for run in runs], [0, 0], name)
+
+    def test_configuration_is_read_only(self):
+        converter = get_converter()
+
+        with self.assertRaises(TypeError):
+            converter.coefficients['sugar'] = 1
+        with self.assertRaises(TypeError):
+            converter.coefficients['butter'][''] = 1
+
+    def test_converters_do_not_add_log_handlers(self):
+        handlers = len(converter_logger.handlers)
+
+        ARConverter('metric_ml')
+        ARConverter('american')
+
+        self.assertEqual(len(converter_logger.handlers), handlers)
+
+
+@skipUnless(images.load_pil(), 'Pillow is not installed')
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+                   PROJECT_IMAGE_WIDTHS=(320, 640))
+class ImageVariantsTest(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.static_dir = directory.name
+        os.makedirs(os.path.join(self.static_dir, 'img'))
+        images.load_pil().new('RGBA', (800, 400), 'red').save(os.path.join(self.static_dir, 'img', 'project.png'))
+
+        static_dirs = override_settings(STATICFILES_DIRS=[self.static_dir])
+        static_dirs.enable()
+        self.addCleanup(static_dirs.disable)
+
+    def test_variants_are_smaller_than_original(self):
+        description = images.make_variants('/img/project.png')
+
+        sizes = [(variant['width'], variant['height'], variant['type']) for variant in description['variants']]
+
+        self.assertEqual(sizes, [(320, 160, 'image/webp'), (320, 160, 'image/jpeg'), (640, 320, 'image/webp'),
+                                 (640, 320, 'image/jpeg'), (800, 400, 'image/webp')])
+        for variant in description['variants']:
+            self.assertTrue(os.path.isfile(os.path.join(self.static_dir, variant['path'])))
+
+    def test_responsive_image_has_srcset_and_size(self):
+        images.make_variants('/img/project.png')
+
+        image = images.responsive_image('/img/project.png')
+
+        self.assertEqual((image['width'], image['height']), (800, 400))
+        self.assertEqual(image['srcset'], '/static/img/variants/project-320w.jpg 320w, '
+                                          '/static/img/variants/project-640w.jpg 640w, /static/img/project.png 800w')
+        self.assertIn('/static/img/variants/project-800w.webp 800w', image['sources'][0]['srcset'])
+
+    def test_variants_missing_from_manifest_are_not_used(self):
+        static_root = os.path.join(self.static_dir, 'collected')
+        os.makedirs(static_root)
+        with open(os.path.join(static_root, 'staticfiles.json'), 'w') as manifest:
+            json.dump({'version': '1.0', 'paths': {'img/project.png': 'img/project.abc123.png'}}, manifest)
+
+        images.make_variants('/img/project.png')
+
+        with override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.ManifestStaticFilesStorage',
+                               STATIC_ROOT=static_root, DEBUG=False):
+            image = images.responsive_image('/img/project.png')
+
+        self.assertEqual((image['src'], image['srcset'], image['sources']), ('/static/img/project.abc123.png', '', []))
+        self.assertEqual((image['width'], image['height']), (800, 400))
+
+    def test_image_missing_from_manifest_is_shown_as_is(self):
+        static_root = os.path.join(self.static_dir, 'collected')
+        os.makedirs(static_root)
+        with open(os.path.join(static_root, 'staticfiles.json'), 'w') as manifest:
+            json.dump({'version': '1.0', 'paths': {}}, manifest)
+
+        with override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.ManifestStaticFilesStorage',
+                               STATIC_ROOT=static_root, DEBUG=False):
+            image = images.responsive_image('/img/new.png')
+
+        self.assertEqual((image['src'], image['srcset']), ('/static/img/new.png', ''))
+
+    def test_card_key_changes_with_variants_and_manifest(self):
+        static_root = os.path.join(self.static_dir, 'collected')
+        os.makedirs(static_root)
+        project = Project(pk=1, title='Converter', image='/img/project.png')
+
+        with override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.ManifestStaticFilesStorage',
+                               STATIC_ROOT=static_root):
+            keys = [card_key(project)]
+            images.make_variants('/img/project.png')
+            keys.append(card_key(project))
+            with open(os.path.join(static_root, 'staticfiles.json'), 'w') as manifest:
+                json.dump({'version': '1.0', 'paths': {}}, manifest)
+            keys.append(card_key(project))
+
+        self.assertEqual(len(set(keys)), 3)
+
+    def test_image_without_variants_is_shown_as_is(self):
+        image = images.responsive_image('/img/project.png')
+
+        self.assertEqual((image['src'], image['srcset'], image['sources']), ('/static/img/project.png', '', []))
+
+    def test_directory_listing_is_cached_until_it_changes(self):
+        path = os.path.join(self.static_dir, 'img/')
+
+        with mock.patch('anevolina.images.os.scandir', wraps=os.scandir) as scandir:
+            self.assertEqual(images.image_choices(path), [(path + 'project.png', 'project.png')])
+            images.image_choices(path)
+            self.assertEqual(scandir.call_count, 1)
+
+            os.utime(path, ns=(0, 0))
+            images.image_choices(path)
+            self.assertEqual(scandir.call_count, 2)
+
+
+class PrecompressedStaticTest(SimpleTestCase):
+    CSS = b'body { color: red; }\n' * 200
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.static_root = os.path.join(directory.name, 'static')
+        os.makedirs(self.static_root)
+        with open(os.path.join(directory.name, 'secret.txt'), 'w') as file:
+            file.write('secret')
+
+        self.storage = storage.PrecompressedManifestStaticFilesStorage(location=self.static_root, base_url='/static/')
+        for name in ('site.css', 'site.0123456789ab.css'):
+            with open(self.storage.path(name), 'wb') as file:
+                file.write(self.CSS)
+            self.storage.compress(name)
+
+        static_root = override_settings(STATIC_ROOT=self.static_root)
+        static_root.enable()
+        self.addCleanup(static_root.disable)
+
+        self.middleware = PrecompressedStaticMiddleware(lambda request: HttpResponse('not static'))
+        self.middleware.hashed_names = {'site.0123456789ab.css'}
+
+    def get(self, path, **headers):
+        return self.middleware(RequestFactory().get(path, **headers))
+
+    def test_only_compressible_versions_are_written(self):
+        with open(self.storage.path('noise.js'), 'wb') as file:
+            file.write(os.urandom(2000))
+        with open(self.storage.path('noise.js.gz'), 'wb') as file:
+            file.write(b'stale')
+
+        self.storage.compress('noise.js')
+
+        self.assertEqual(gzip.decompress(self.storage.open('site.css.gz').read()), self.CSS)
+        self.assertFalse(self.storage.exists('noise.js.gz'))
+        self.assertFalse(self.storage.exists('noise.js.br'))
+
+    def test_accepted_encoding_is_served(self):
+        encodings = {'': None, 'gzip, deflate': 'gzip', 'gzip, br': 'br' if storage.brotli else 'gzip',
+                     'gzip;q=0, identity': None}
+
+        for header, encoding in encodings.items():
+            response = self.get('/static/site.css', HTTP_ACCEPT_ENCODING=header)
+            self.assertEqual(response.get('Content-Encoding'), encoding, header)
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_only_hashed_names_are_immutable(self):
+        self.assertEqual(self.get('/static/site.0123456789ab.css')['Cache-Control'], IMMUTABLE)
+        self.assertEqual(self.get('/static/site.css')['Cache-Control'], REVALIDATE)
+
+    def test_unchanged_file_is_not_sent_again(self):
+        response = self.get('/static/site.css', HTTP_ACCEPT_ENCODING='gzip')
+
+        cached = self.get('/static/site.css', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        other_encoding = self.get('/static/site.css', HTTP_IF_NONE_MATCH=response['ETag'])
+        modified_since = self.get('/static/site.css', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        self.assertEqual((cached.status_code, cached.content, cached['ETag']), (304, b'', response['ETag']))
+        self.assertEqual(other_encoding.status_code, 200)
+        self.assertEqual(modified_since.status_code, 304)
+
+    def test_files_outside_static_root_are_not_served(self):
+        for path in ('/static/../secret.txt', '/static/%2e%2e/secret.txt', '/static/missing.css'):
+            self.assertEqual(self.get(path).content, b'not static', path)
@@ -0,0 +1,124 @@
+'''
+This module keeps the converter responsive under bursts.
+Every client has a request counter stored in the django cache, and the number
+of simultaneous translations of all workers is counted there too - when all slots
+are busy the recipe stays untranslated instead of waiting for Google.
+Lines covered by the glossary are translated in-process and don't take a slot
+'''
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from anevolina.modules.glossary import translate_known_lines
+from anevolina.modules.translation import translate
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_SLOTS_KEY = 'converter-translations'
+
+
+def client_key(request):
+    return 'converter-requests:' + client_ip(request)
+
+
+def client_ip(request):
+    """Address of the client. Behind CONVERTER_TRUSTED_PROXIES proxies it's the address the farthest
+    of them saw - X-Forwarded-For addresses before it can be made up by the client"""
+
+    proxies = settings.CONVERTER_TRUSTED_PROXIES
+    forwarded = [address.strip() for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+                 if address.strip()]
+
+    if proxies and len(forwarded) >= proxies:
+        return forwarded[-proxies]
+
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def take_token(key, rate=None, burst=None):
+    """Count a request of the client. Every window of burst/rate seconds allows burst requests,
+    so a client gets rate requests per second on average. Returns False if the window is full.
+
+    cache.add and cache.incr are atomic in memcached, redis and the local memory cache,
+    so simultaneous requests of one client are all counted"""
+
+    rate = rate or settings.CONVERTER_RATE
+    burst = burst or settings.CONVERTER_BURST
+    window = burst/rate
+
+    window_key = '{}:{}'.format(key, int(time.time() // window))
+    cache.add(window_key, 0, timeout=int(window) + 1)
+
+    try:
+        return cache.incr(window_key) <= burst
+    except ValueError:      # the window has just expired
+        return True
+
+
+def translate_if_free(text, dest='ru'):
+    """Translate text if there is a free translation slot, otherwise return None.
+    None is returned when the translator fails as well.
+    Only lines unknown to the glossary are sent to the translator"""
+
+    lines = text.split('\n')
+    translated = translate_known_lines(lines, dest)
+    residual = [line for line, translation in zip(lines, translated) if translation is None and line.strip()]
+
+    logger.debug('Translation: %s lines are known, %s are sent', len(lines) - len(residual), len(residual))
+
+    if residual:
+        remote = translate_remote('\n'.join(residual), dest)
+        if remote is None:
+            return None
+
+        remote = remote.split('\n')
+        if len(remote) != len(residual):
+            logger.warning('Translation returned %s lines instead of %s', len(remote), len(residual))
+            return None
+
+        remote = iter(remote)
+        translated = [translation if translation is not None else (next(remote) if line.strip() else line)
+                      for line, translation in zip(lines, translated)]
+
+    return '\n'.join(translated)
+
+
+def take_translation_slot():
+    """Take one of CONVERTER_TRANSLATION_CONCURRENCY slots shared by all workers. Returns False if all are busy.
+    The counter expires, so slots of a worker killed in the middle of a translation are freed"""
+
+    cache.add(TRANSLATION_SLOTS_KEY, 0, timeout=settings.TRANSLATION_TIMEOUT*3)
+
+    try:
+        if cache.incr(TRANSLATION_SLOTS_KEY) <= settings.CONVERTER_TRANSLATION_CONCURRENCY:
+            return True
+    except ValueError:      # the counter has just expired
+        return False
+
+    release_translation_slot()
+    return False
+
+
+def release_translation_slot():
+    try:
+        # The counter could expire and start again from 0 while the slot was taken
+        if cache.decr(TRANSLATION_SLOTS_KEY) < 0:
+            cache.incr(TRANSLATION_SLOTS_KEY)
+    except ValueError:
+        pass
+
+
+def translate_remote(text, dest):
+    if not take_translation_slot():
+        return None
+
+    try:
+        return translate(text, dest=dest)
+    except Exception as error:
+        logger.warning('Translation failed: %r', error)
+        return None
+    finally:
+        release_translation_slot()
@@ -3,5 +3,9 @@ from anevolina import views
 
 urlpatterns = [
     path('', views.index, name='index'),
-    path('<int:pk>/', views.project_details, name='project_details')
+    path('<int:pk>/', views.project_details, name='project_details'),
+    path('converter/lines/', views.convert_lines, name='convert_lines'),
+    path('converter/stream/', views.convert_stream, name='convert_stream'),
+    path('converter/tables/check/', views.check_conversion_tables, name='check_conversion_tables'),
+    path('converter/tables/<str:version>.json', views.conversion_tables, name='conversion_tables'),
 ]
\ No newline at end of file
@@ -1,13 +1,28 @@
-from googletrans import Translator
+import json
 import logging
-
-from django.shortcuts import render
+from functools import partial
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import require_POST
 from anevolina.models import Project
+from anevolina.cards import get_cards
+from anevolina import conversions
 from portfolio.settings import STATICFILES_DIRS
 from . import forms
 
 # Import my modules
-from anevolina.modules.converter import ARConverter
+from anevolina.modules import incremental
+from anevolina.modules.results import render_html
+from anevolina.modules.tables import get_tables
+from anevolina.modules.profiles import PROFILES, DEFAULT_PROFILE
+from anevolina.throttling import client_key, take_token, translate_if_free
+from anevolina.shadow import shadow_compare
+from anevolina.streaming import NDJSON, TEXT, streaming_conversion
 
 
 # Create your views here.
@@ -19,7 +34,7 @@ def index(request, project=None):
 
     projects = Project.objects.all()
 
-    context = {'projects': projects}
+    context = {'cards': reversed(get_cards(projects))}
 
     return render(request, 'anevolina/index.html', context)
 
@@ -44,8 +59,11 @@ def words_game(request, project):
 
 def converter(request, project):
     conv_recipe = 'converted text\'s here'
+    converted_lines = None
     English = True
     text = ''
+    status = 200
+    target = PROFILES.get(request.POST.get('target'), PROFILES[DEFAULT_PROFILE])
 
 
     if request.method != 'POST':
@@ -54,9 +72,11 @@ def converter(request, project):
     else:
         form = forms.ConverterForm(request.POST)
 
-        if form.is_valid():
+        if form.is_valid() and not take_token(client_key(request)):
+            form.add_error(None, 'Too many conversions, please wait a few seconds')
+            status = 429
 
-            converter = ARConverter()
+        elif form.is_valid():
 
             ex = request.POST.get('ex')
             if ex:
@@ -65,22 +85,113 @@ def converter(request, project):
             else:
                 text = form.cleaned_data['recipe']
 
-            conv_recipe = ''
-            for line in text.split('\n'):
-                conv_recipe += converter.process_line(line) + '\n'
+            lines = text.split('\n')
+            results = conversions.convert_lines(target.name, lines, settings.CONVERTER_REQUEST_BUDGET,
+                                                settings.CONVERTER_LINE_BUDGET)
+            converted = [result.text for result in results]
+            conv_recipe = ''.join(line + '\n' for line in converted)
+            converted_lines = [mark_safe(render_html(result)) for result in results]
+
+            # The legacy converter knows only the default profile
+            if target.name == DEFAULT_PROFILE:
+                shadow_compare(lines, results)
 
             to_translate = request.POST.get('to_translate')
             if to_translate == 'RU':
-                English = False
-                translator = Translator(service_urls=[
-                    'translate.google.com',
-                    'translate.google.co.kr', ])
-                translation = translator.translate(conv_recipe, dest='ru')
-                conv_recipe = translation.text
+                translation = translate_if_free(conv_recipe, dest='ru')
+
+                # All translation slots are busy - show the recipe in English rather than wait
+                if translation is not None:
+                    English = False
+                    conv_recipe = translation
+                    converted_lines = translation.splitlines()
+
+    context = {'form': form, 'translation': conv_recipe, 'lines': converted_lines, 'En': English, 'project': project, 'recipe': text,
+               'target': target, 'profiles': PROFILES.values(),
+               'tables_url': reverse('conversion_tables', args=[get_tables()['version']])}
+
+    return render(request, 'anevolina/converter.html', context, status=status)
+
+@require_POST
+def convert_lines(request):
+    """Live editing - convert only new or changed lines and return them as a patch"""
+
+    if not take_token(client_key(request) + ':lines', settings.CONVERTER_PATCH_RATE, settings.CONVERTER_PATCH_BURST):
+        return JsonResponse({'error': 'Too many conversions, please wait a few seconds'}, status=429)
+
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+        count, changed = incremental.read_changed_lines(data, settings.CONVERTER_MAX_LINES,
+                                                        settings.CONVERTER_MAX_CHARS)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    target = PROFILES.get(data.get('target'), PROFILES[DEFAULT_PROFILE])
+    translate = partial(translate_if_free, dest='ru') if data.get('to_translate') == 'RU' else None
+
+    convert = partial(conversions.convert_lines, target.name, budget=settings.CONVERTER_REQUEST_BUDGET,
+                      line_budget=settings.CONVERTER_LINE_BUDGET)
+    patch, translated = incremental.convert_lines(convert, changed, translate)
+
+    return JsonResponse({'count': count, 'patch': patch, 'translated': translated})
+
+@require_POST
+def convert_stream(request):
+    """Convert the whole recipe and stream converted lines as they are ready - a json object per line,
+    or plain text with format=text. Compressed with brotli or gzip if the browser accepts it"""
+
+    if not take_token(client_key(request)):
+        return JsonResponse({'error': 'Too many conversions, please wait a few seconds'}, status=429)
+
+    form = forms.ConverterForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'error': form.errors.get_json_data()}, status=400)
+
+    target = PROFILES.get(request.POST.get('target'), PROFILES[DEFAULT_PROFILE])
+    content_type = TEXT if request.POST.get('format') == 'text' else NDJSON
+
+    return streaming_conversion(request, target.name, form.cleaned_data['recipe'].split('\n'), content_type)
+
+def conversion_tables(request, version):
+    """Tables for converting simple lines in the browser. The url has the version, so it's cached for good"""
+
+    tables = get_tables()
+
+    if version != tables['version']:
+        return redirect('conversion_tables', tables['version'])
+
+    response = JsonResponse(tables)
+    patch_cache_control(response, public=True, max_age=settings.CONVERTER_TABLES_MAX_AGE, immutable=True)
+
+    return response
+
+@require_POST
+def check_conversion_tables(request):
+    """Check lines the page converted with the tables {'version': ..., 'results': {profile: [[line, text]]}}
+    against the server converter"""
+
+    if not take_token(client_key(request) + ':tables', settings.CONVERTER_PATCH_RATE, settings.CONVERTER_PATCH_BURST):
+        return JsonResponse({'error': 'Too many checks, please wait a few seconds'}, status=429)
+
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+        results = data['results']
+        if not isinstance(results, dict) or not all(name in PROFILES and isinstance(pairs, list)
+                                                    for name, pairs in results.items()):
+            raise ValueError('Expected results of known profiles')
+        results = {name: [(str(line), text) for line, text in pairs] for name, pairs in results.items()}
+        lines = [line for pairs in results.values() for line, text in pairs]
+        if len(lines) > settings.CONVERTER_MAX_LINES or sum(map(len, lines)) > settings.CONVERTER_MAX_CHARS:
+            raise ValueError('Too many lines, maximum is {}'.format(settings.CONVERTER_MAX_LINES))
+        mismatches, checked = conversions.check_client_results(results, settings.CONVERTER_REQUEST_BUDGET,
+                                                               settings.CONVERTER_LINE_BUDGET)
+    except (ValueError, KeyError, TypeError) as error:
+        return JsonResponse({'error': str(error)}, status=400)
 
-    context = {'form': form, 'translation': conv_recipe, 'En': English, 'project': project, 'recipe': text}
+    version = get_tables()['version']
 
-    return render(request, 'anevolina/converter.html', context)
+    return JsonResponse({'version': version, 'current': data.get('version') == version, 'checked': checked,
+                         'mismatches': mismatches})
 
 def get_convert_example(number):
     file_name = 'anevolina/static/examples/converter_' + str(number) + '.txt'
@@ -0,0 +1,89 @@
+'''
+This module prepares a worker before it accepts traffic.
+It imports heavy dependencies, loads the emoji base, coefficients and the glossary,
+builds converters for all profiles and runs them once, so regular expressions are
+compiled too. Called from portfolio/wsgi.py - with gunicorn --preload it runs once in
+the master process and workers share the loaded data
+'''
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_LINES = ['1 1/2 cups brown sugar', '2-3 oz butter', 'Bake at 350°F for 30 minutes', '9x13 pan',
+                '200 g chocolate', '180 C']
+
+
+def warm_up():
+    """Run all warm-up steps and report how long each of them took. Returns {step: seconds}"""
+
+    steps = [('googletrans', import_translator),
+             ('demoji', load_emoji_codes),
+             ('coefficients', load_coefficients),
+             ('glossary', load_glossary),
+             ('converters', prepare_converters),
+             ('tables', export_tables)]
+
+    timings = {}
+    started = time.perf_counter()
+
+    for name, step in steps:
+        step_started = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - step_started
+        logger.info('Warm-up step %s took %.3f s', name, timings[name])
+
+    timings['total'] = time.perf_counter() - started
+    logger.info('Warm-up finished in %.3f s', timings['total'])
+
+    return timings
+
+
+def import_translator():
+    from anevolina.modules.translation import get_translator
+
+    get_translator()
+
+
+def load_emoji_codes():
+    """Import demoji and compile its emoji pattern. The base must be downloaded beforehand"""
+
+    from anevolina.modules.emojis import load_demoji
+
+    try:
+        load_demoji()
+    except IOError as error:
+        logger.warning('Emoji base is not loaded: %s', error)
+
+
+def load_coefficients():
+    from anevolina.modules.converter import load_coefficients
+
+    load_coefficients()
+
+
+def load_glossary():
+    from anevolina.modules.glossary import load_glossary
+
+    load_glossary('ru')
+
+
+def prepare_converters():
+    """Build a converter for every profile and convert sample lines to compile regexes"""
+
+    from anevolina.modules.converter import get_converter
+    from anevolina.modules.profiles import PROFILES
+
+    for name in PROFILES:
+        converter = get_converter(name)
+        for line in SAMPLE_LINES:
+            converter.process_line(line)
+
+
+def export_tables():
+    """Tables for the browser convert sample lines too, the converter page needs their version"""
+
+    from anevolina.modules.tables import get_tables
+
+    get_tables()
@@ -42,10 +42,11 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'bootstrap3',
-    'anevolina',
+    'anevolina.apps.AnevolinaConfig',
 ]
 
 MIDDLEWARE = [
+    'anevolina.middleware.PrecompressedStaticMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,12 +58,23 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'portfolio.urls'
 
+# Parsed templates are cached in production. Set DJANGO_CACHED_TEMPLATES=1 to cache them
+# with DEBUG as well - then changes in templates need a restart
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+if not DEBUG or os.environ.get('DJANGO_CACHED_TEMPLATES') == '1':
+    TEMPLATE_LOADERS = [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -79,10 +91,18 @@ WSGI_APPLICATION = 'portfolio.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# portfolio.sqlite3 is the stock backend with WAL and read-friendly pragmas, see portfolio/sqlite3/base.py.
+# WAL mode is stored in the database file, so the first connection changes the tracked db.sqlite3 (its -wal
+# and -shm files are ignored). Run `sqlite3 db.sqlite3 'PRAGMA journal_mode = DELETE'` before committing it
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'portfolio.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'timeout': 20,
+        },
     }
 }
 
@@ -126,9 +146,105 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = ['anevolina/static']
 
+# collectstatic writes hashed names and .gz/.br versions to STATIC_ROOT,
+# PrecompressedStaticMiddleware serves them with far-future cache headers
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'anevolina.storage.PrecompressedManifestStaticFilesStorage'
+
+# Project images are resized to these widths on save, see anevolina/images.py.
+# Cards take a third of the page on desktops and the whole width on phones
+PROJECT_IMAGE_WIDTHS = (320, 640, 960)
+PROJECT_IMAGE_SIZES = '(min-width: 992px) 33vw, 100vw'
+
 
 # Settings for Django Bootstrap3
 
 BOOTSTRAP3 = {
     'include_jquery': True
-}
\ No newline at end of file
+}
+
+
+# Converter admission control. Request counters and translation slots live in the default cache - use a shared
+# cache (memcached, redis) when there are several workers.
+# A client gets BURST requests in every window of BURST/RATE seconds (20 s for the page) - counting in windows
+# with cache.add and cache.incr is atomic, a token bucket isn't. Unlike a bucket, up to 2*BURST requests pass
+# around the end of a window, and a client who spent the whole burst waits for the next window instead of
+# getting a request every 1/RATE seconds.
+# Clients are told apart by REMOTE_ADDR. Behind a reverse proxy it's the address of the proxy, so all clients
+# would share one limit - set the number of proxies which append to X-Forwarded-For (1 for a single nginx)
+
+CONVERTER_MAX_CHARS = 20000
+CONVERTER_MAX_LINES = 300
+CONVERTER_RATE = 0.5  # requests per second for one client
+CONVERTER_BURST = 10
+CONVERTER_TRUSTED_PROXIES = int(os.environ.get('CONVERTER_TRUSTED_PROXIES', 0))
+CONVERTER_TRANSLATION_CONCURRENCY = 4  # for all workers
+CONVERTER_PATCH_RATE = 5  # live editing sends small patches more often
+CONVERTER_PATCH_BURST = 20
+
+# CPU seconds for one line and for all lines of a request. Lines over the budget are returned
+# unconverted with a marker
+CONVERTER_LINE_BUDGET = 0.05
+CONVERTER_REQUEST_BUDGET = 2
+CONVERTER_RESULT_TIMEOUT = 60*60  # converted lines are shared by the page, live editing and translation
+CONVERTER_TABLES_MAX_AGE = 365*24*60*60  # tables for the browser have their version in the url
+
+# Streamed conversions are sent in batches of lines, each batch is compressed and flushed
+CONVERTER_STREAM_BATCH = 20
+CONVERTER_STREAM_GZIP_LEVEL = 6
+CONVERTER_STREAM_BROTLI_QUALITY = 5
+
+# Translation. Set TRANSLATION_SERVICE_URL to send texts to another service instead of Google,
+# e.g. to the stub started by `manage.py loadtest`
+
+TRANSLATION_SERVICE_URL = os.environ.get('TRANSLATION_SERVICE_URL')
+TRANSLATION_TIMEOUT = 10
+
+# Percent of conversions compared with the legacy converter in background, see anevolina/shadow.py.
+# Numbers within the relative tolerance are the same - the engines round fractions differently
+CONVERTER_SHADOW_PERCENT = 0
+CONVERTER_SHADOW_QUEUE = 8
+CONVERTER_SHADOW_TOLERANCE = 0.05
+
+
+# Warm-up. Workers always warm up in wsgi.py (disable with DJANGO_WARM_UP=0),
+# set True to warm up in AppConfig.ready() for every process, including management commands
+
+WARM_UP_ON_READY = False
+
+# Lines the converter couldn't handle go to log/converter_log.log.
+# The directory is created with the file on the first message
+
+LOG_DIR = os.path.join(BASE_DIR, 'log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'timed': {
+            'format': '%(asctime)s - %(levelname)s - %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'converter_file': {
+            'class': 'anevolina.logs.DirectoryFileHandler',
+            'filename': os.path.join(LOG_DIR, 'converter_log.log'),
+            'formatter': 'timed',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'anevolina': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'anevolina.modules.converter': {
+            'handlers': ['converter_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
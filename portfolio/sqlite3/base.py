@@ -0,0 +1,28 @@
+"""
+SQLite backend tuned for a read-mostly site.
+
+Every new connection switches the database to WAL, so page reads don't wait
+for admin writes, and sets pragmas from PRAGMAS. Use it with CONN_MAX_AGE,
+so connections (and their page cache) live longer than a request.
+"""
+
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),    # safe with WAL, fsync only on checkpoints
+    ('mmap_size', 256 * 1024 * 1024),
+    ('cache_size', -20000),       # negative means KiB, 20 MB of page cache per connection
+    ('temp_store', 'MEMORY'),
+)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+
+        for name, value in PRAGMAS:
+            conn.execute('PRAGMA {} = {}'.format(name, value))
+
+        return conn
@@ -7,10 +7,24 @@ For more information on this file, see
 https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 """
 
+import gc
+import logging
 import os
+import time
 
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio.settings')
 
+started = time.perf_counter()
 application = get_wsgi_application()
+logging.getLogger('anevolina.warmup').info('Django application loaded in %.3f s', time.perf_counter() - started)
+
+# Load everything before the worker accepts traffic. With gunicorn --preload this happens once
+# in the master process, and freezing gc keeps the loaded objects in pages shared with workers
+if os.environ.get('DJANGO_WARM_UP', '1') == '1':
+    from anevolina.warmup import warm_up
+    warm_up()
+
+    if hasattr(gc, 'freeze'):
+        gc.freeze()